@@ -1,12 +1,21 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+
+images = [('egely wheel graphic clockwise .png', '.'), ('egely wheel counter clockwise .png', '.'), ('Egely Wheel Graphic both directions.png', '.'), ('Egely wheel no background graphic counter clockwise.png', '.'), ('black_egely_wheel_only.png', '.'), ('green_arrow_clockwise.png', '.'), ('green_arrow_anticlockwise.png', '.'), ('light_blue_arrows_transparent.png', '.')]
+audio = [('spin clockwise.mp3', '.'), ('spin counter clockwise.mp3', '.'), ('spin clockwise or counter clockwise.mp3', '.'), ('Spin fast in either direction.mp3', '.'), ('Ten seconds to focus intentions.mp3', '.'), ('Begin.mp3', '.'), ('stop.mp3', '.'), ('end_of_game.mp3', '.'), ('spin clockwise 1 to roations then anti clockwise 1 to 2 rotations.mp3', '.')]
+# assets.bundle (python asset_bundle.py) ships next to the loose files,
+# which stay the fallback when it is ignored or lacks an entry
+datas = images + audio
+if os.path.exists('assets.bundle'):
+    datas.append(('assets.bundle', '.'))
 
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('egely wheel graphic clockwise .png', '.'), ('egely wheel counter clockwise .png', '.'), ('Egely Wheel Graphic both directions.png', '.'), ('Egely wheel no background graphic counter clockwise.png', '.'), ('black_egely_wheel_only.png', '.'), ('green_arrow_clockwise.png', '.'), ('green_arrow_anticlockwise.png', '.'), ('light_blue_arrows_transparent.png', '.'), ('spin clockwise.mp3', '.'), ('spin counter clockwise.mp3', '.'), ('spin clockwise or counter clockwise.mp3', '.'), ('Spin fast in either direction.mp3', '.'), ('Ten seconds to focus intentions.mp3', '.'), ('Begin.mp3', '.'), ('stop.mp3', '.'), ('end_of_game.mp3', '.'), ('spin clockwise 1 to roations then anti clockwise 1 to 2 rotations.mp3', '.')],
-    hiddenimports=[],
+    datas=datas,
+    hiddenimports=['sensor', 'serial'],  # Imported only when EGELY_SENSOR is set
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+
+log = logging.getLogger("egely")
+
+BUNDLE_NAME = "assets.bundle"
+BUNDLE_MAGIC = b"EGLYBND1"
+BUNDLE_ALIGN = 64  # Every blob starts on a multiple of this many bytes
+# Byte order of the stored pixels; on little-endian machines it is the layout
+# of pygame's 32-bit display format, so the surfaces need no conversion
+BUNDLE_PIXEL_FORMAT = "BGRA"
+# Window sizes the images are pre-scaled for; other sizes scale from the originals
+BUNDLE_WINDOW_SIZES = [(1280, 720), (1440, 900), (1920, 1080)]
+
+# File layout: BUNDLE_MAGIC, the header length as a little-endian uint32, the
+# JSON header, then the blobs from the next BUNDLE_ALIGN boundary on. Offsets
+# are relative to the first blob. The header is
+#   {"mixer": [frequency, format, channels],
+#    "images": {name: {"size": [w, h], "offset": o, "scaled": {"WxH": o}, "source": stamp}},
+#    "sounds": {name: {"offset": o, "length": n, "source": stamp}}}
+# Images are raw BUNDLE_PIXEL_FORMAT pixels and sounds raw PCM in the mixer
+# format, as returned by Sound.get_raw(). A stamp is the source file's
+# {"size", "mtime_ns", "sha1"}; see source_stamp() and is_current().
+
+
+def source_stamp(path):
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        sha1 = hashlib.sha1(f.read()).hexdigest()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1}
+
+
+def is_current(stamp, path):
+    # Whether the loose file at path is still what the entry was built from.
+    # Without the file (a shipped bundle) the entry is used. The file is only
+    # hashed when its size matches but its mtime does not, e.g. after a copy.
+    try:
+        st = os.stat(path)
+    except OSError:
+        return True
+    if stamp is None or st.st_size != stamp["size"]:
+        return False
+    if st.st_mtime_ns == stamp["mtime_ns"]:
+        return True
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest() == stamp["sha1"]
+
+
+class AssetBundle:
+    # Read-only view of a bundle file. Image surfaces are made directly on the
+    # memory map, so their pages are only read in when they are drawn or
+    # scaled, and images never drawn at their original size cost no memory.
+    # The map stays open for the life of the process since the surfaces point
+    # into it. Entries whose loose file in source_dir (default: the bundle's
+    # directory) has changed since the build are dropped, so edited files are
+    # loaded from disk instead.
+    def __init__(self, path, source_dir=None):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            raise ValueError(f"Not an asset bundle: {path}")
+        (length,) = struct.unpack_from("<I", self.map, len(BUNDLE_MAGIC))
+        start = len(BUNDLE_MAGIC) + 4
+        header = json.loads(self.map[start:start + length])
+        start += length
+        self.base = start + (-start % BUNDLE_ALIGN)
+        self.mixer = tuple(header["mixer"])
+        self.images = header["images"]
+        self.sounds = header["sounds"]
+        self.view = memoryview(self.map)
+        source_dir = os.path.dirname(path) if source_dir is None else source_dir
+        for entries in (self.images, self.sounds):
+            for name in [n for n, e in entries.items() if not is_current(e.get("source"), os.path.join(source_dir, n))]:
+                log.info("Asset bundle entry %s is stale, using the file", name)
+                del entries[name]
+
+    def image(self, name, size=None):
+        # The original image, or its copy pre-scaled to `size`; None when the
+        # bundle does not have it
+        entry = self.images.get(name)
+        if entry is None:
+            return None
+        if size is None:
+            size, offset = tuple(entry["size"]), entry["offset"]
+        else:
+            offset = entry["scaled"].get(f"{size[0]}x{size[1]}")
+            if offset is None:
+                return None
+        offset += self.base
+        return pygame.image.frombuffer(self.view[offset:offset + size[0] * size[1] * 4], size, BUNDLE_PIXEL_FORMAT)
+
+    def sound(self, name):
+        # None when missing or when the mixer does not run in the bundle's format
+        entry = self.sounds.get(name)
+        if entry is None or pygame.mixer.get_init() != self.mixer:
+            return None
+        offset = self.base + entry["offset"]
+        return pygame.mixer.Sound(buffer=self.view[offset:offset + entry["length"]])
+
+
+def open_bundle(path):
+    # AssetBundle, or None when there is no usable bundle at path
+    if not os.path.exists(path):
+        return None
+    try:
+        return AssetBundle(path)
+    except (OSError, ValueError, KeyError) as e:
+        log.warning("Ignoring asset bundle %s: %s", path, e)
+        return None
+
+
+def build(out, window_sizes=BUNDLE_WINDOW_SIZES):
+    # Decodes every image and sound the app loads and writes them to `out`.
+    # Scaled copies are made by AssetCache, so they match the runtime ones.
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    import main
+
+    image_sizes = {}  # name -> base sizes it is drawn at
+    for spec in main.ROUND_SPECS:
+        plan = main.RoundPlan(spec)
+        for layers in plan.layers.values():
+            for name, size in layers:
+                image_sizes.setdefault(name, set()).add(size)
+        image_sizes.setdefault(plan.arrow_name, set()).add(plan.arrow_size)
+    image_files = list(main.SPECIAL_IMAGES) + [f for f in main.INSTRUCTION_IMAGES if f not in main.SPECIAL_IMAGES]
+    audio_files = list(dict.fromkeys(main.INSTRUCTION_AUDIO + main.ADDITIONAL_AUDIO))
+
+    header = {"mixer": list(pygame.mixer.get_init()), "images": {}, "sounds": {}}
+    blobs = []
+    offset = 0
+
+    def add(data):
+        nonlocal offset
+        position = offset
+        blobs.append(data)
+        offset += len(data)
+        pad = -offset % BUNDLE_ALIGN
+        if pad:
+            blobs.append(bytes(pad))
+            offset += pad
+        return position
+
+    for name in image_files:
+        path = main.resource_path(name)
+        if not os.path.exists(path):
+            print(f"Skipping missing image: {name}", file=sys.stderr)
+            continue
+        original = pygame.image.load(path).convert_alpha()
+        entry = {"size": list(original.get_size()),
+                 "offset": add(pygame.image.tobytes(original, BUNDLE_PIXEL_FORMAT)), "scaled": {},
+                 "source": source_stamp(path)}
+        for window_size in window_sizes:
+            cache = main.AssetCache(window_size)
+            cache.add(name, original)
+            for base_size in sorted(image_sizes.get(name, ())):
+                w, h = cache.size_for(base_size)
+                if f"{w}x{h}" not in entry["scaled"]:
+                    scaled = cache.get(name, base_size)
+                    entry["scaled"][f"{w}x{h}"] = add(pygame.image.tobytes(scaled, BUNDLE_PIXEL_FORMAT))
+        header["images"][name] = entry
+    for name in audio_files:
+        path = main.resource_path(name)
+        if not os.path.exists(path):
+            print(f"Skipping missing audio: {name}", file=sys.stderr)
+            continue
+        raw = pygame.mixer.Sound(path).get_raw()
+        header["sounds"][name] = {"offset": add(raw), "length": len(raw), "source": source_stamp(path)}
+
+    encoded = json.dumps(header).encode()
+    start = len(BUNDLE_MAGIC) + 4 + len(encoded)
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack("<I", len(encoded)))
+        f.write(encoded)
+        f.write(bytes(-start % BUNDLE_ALIGN))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, out)
+    pygame.quit()
+    return len(header["images"]), len(header["sounds"]), start + (-start % BUNDLE_ALIGN) + offset
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Pack the Egely Wheel images and audio into one memory-mappable file.")
+    parser.add_argument("--out", default=BUNDLE_NAME, help=f"bundle to write (default: {BUNDLE_NAME})")
+    parser.add_argument("--window-sizes", help="comma separated WxH list the images are pre-scaled for "
+                        "(default: " + ",".join(f"{w}x{h}" for w, h in BUNDLE_WINDOW_SIZES) + ")")
+    args = parser.parse_args(argv)
+    window_sizes = BUNDLE_WINDOW_SIZES
+    if args.window_sizes:
+        window_sizes = [tuple(int(v) for v in s.split("x")) for s in args.window_sizes.split(",")]
+    images, sounds, size = build(args.out, window_sizes)
+    print(f"Wrote {args.out}: {images} images, {sounds} sounds, {size / 1024 / 1024:.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,210 @@
+import os
+
+# Benchmarks run on SDL's dummy drivers; set them before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+import main
+from headless import SimulatedClock
+
+WINDOW_SIZES = [(800, 600), (1280, 720), (1920, 1080), (2560, 1440), (3840, 2160)]
+STATES = [main.STATE_STARTUP, main.STATE_INSTRUCTION, main.STATE_ATTEMPT, main.STATE_END]
+WARMUP_FRAMES = 420  # More than one full arrow turn, so the rotation cache is filled
+MEASURE_FRAMES = 600
+REPEATS = 3  # Measured passes per scenario; the fastest one is reported
+ALLOC_FRAMES = 120
+FPS_TOLERANCE = 0.15  # Allowed fractional drop in frames/second against the baseline
+ALLOC_TOLERANCE = 0.5  # Allowed increase in surface allocations per frame
+
+# pygame calls that return a new Surface, counted while measuring allocations
+SURFACE_FACTORIES = [
+    (pygame.transform, "rotate"),
+    (pygame.transform, "rotozoom"),
+    (pygame.transform, "smoothscale"),
+    (pygame.transform, "scale"),
+    (pygame, "Surface"),
+]
+
+
+class SurfaceAllocationCounter:
+    # Temporarily wraps SURFACE_FACTORIES to count how many new surfaces are made
+    def __init__(self):
+        self.count = 0
+        self.originals = []
+
+    def __enter__(self):
+        for module, name in SURFACE_FACTORIES:
+            original = getattr(module, name)
+            self.originals.append((module, name, original))
+            setattr(module, name, self._wrap(original))
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, original in self.originals:
+            setattr(module, name, original)
+        self.originals = []
+
+    def _wrap(self, original):
+        def counted(*args, **kwargs):
+            self.count += 1
+            return original(*args, **kwargs)
+        return counted
+
+
+def enter_scenario(app, state, instruction):
+    # Put the app into `state` with `instruction` as the current round
+    app.reset_game()
+    spec = main.ROUND_SPECS[main.INSTRUCTIONS.index(instruction)]
+    others = [s for s in main.ROUND_SPECS if s is not spec]
+    app.compile_rounds([spec] + others[:main.ROUND_TOTAL - 1])
+    if state in (main.STATE_INSTRUCTION, main.STATE_ATTEMPT):
+        app.start_instruction_phase()
+    if state == main.STATE_ATTEMPT:
+        app.start_attempt_phase()
+    if state == main.STATE_END:
+        app.set_state(main.STATE_END)
+
+
+def restart_phase_timer(app):
+    # Keep the measured phase from running out mid-measurement
+    if app.state == main.STATE_INSTRUCTION:
+        app.timer = main.INSTRUCTION_SECONDS
+    elif app.state == main.STATE_ATTEMPT:
+        app.timer = main.ATTEMPT_SECONDS
+
+
+def measure(app, frames):
+    update_time = render_time = 0.0
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        app.advance(main.SIM_DT)
+        t1 = time.perf_counter()
+        app.render()
+        t2 = time.perf_counter()
+        update_time += t1 - t0
+        render_time += t2 - t1
+    return update_time, render_time
+
+
+def run_scenario(app, state, instruction, warmup, frames):
+    enter_scenario(app, state, instruction)
+    measure(app, warmup)
+    update_time = render_time = float("inf")
+    for _ in range(REPEATS):
+        restart_phase_timer(app)
+        u, r = measure(app, frames)
+        if u + r < update_time + render_time:
+            update_time, render_time = u, r
+    # Allocations are measured in a separate, shorter pass since tracing slows frames down
+    tracemalloc.start()
+    py_bytes = 0
+    with SurfaceAllocationCounter() as counter:
+        for _ in range(ALLOC_FRAMES):
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            app.advance(main.SIM_DT)
+            app.render()
+            _, peak = tracemalloc.get_traced_memory()
+            py_bytes += peak - start
+    tracemalloc.stop()
+    return {
+        "update_fps": frames / max(update_time, 1e-9),
+        "render_fps": frames / max(render_time, 1e-9),
+        "fps": frames / max(update_time + render_time, 1e-9),
+        "surface_allocs_per_frame": counter.count / ALLOC_FRAMES,
+        "py_alloc_kib_per_frame": py_bytes / ALLOC_FRAMES / 1024,
+    }
+
+
+def scenarios():
+    for state in STATES:
+        if state == main.STATE_END:
+            yield state, main.INSTRUCTIONS[0]
+        else:
+            for instruction in main.INSTRUCTIONS:
+                yield state, instruction
+
+
+def run_benchmarks(sizes, warmup, frames, seed=0, renderer=None, logical_size=None):
+    results = {}
+    app = main.EgelyApp(clock=SimulatedClock(), rng=random.Random(seed), window_size=sizes[0], renderer=renderer,
+                        logical_size=logical_size)
+    for size in sizes:
+        app.handle_event(pygame.event.Event(pygame.VIDEORESIZE, size=size, w=size[0], h=size[1]))
+        for state, instruction in scenarios():
+            name = f"{size[0]}x{size[1]}/{state}" + ("" if state == main.STATE_END else f"/{instruction}")
+            results[name] = run_scenario(app, state, instruction, warmup, frames)
+    return results
+
+
+def compare(results, baseline, fps_tolerance=FPS_TOLERANCE):
+    # Returns a list of human-readable regressions
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["fps"] < base["fps"] * (1 - fps_tolerance):
+            regressions.append(f"{name}: {result['fps']:.0f} fps, baseline {base['fps']:.0f}")
+        if result["surface_allocs_per_frame"] > base["surface_allocs_per_frame"] + ALLOC_TOLERANCE:
+            regressions.append(f"{name}: {result['surface_allocs_per_frame']:.2f} surface allocs/frame, "
+                               f"baseline {base['surface_allocs_per_frame']:.2f}")
+    return regressions
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark EgelyApp update/render per state, round type and window size.")
+    parser.add_argument("--sizes", help="comma separated WxH list, default 800x600 up to 3840x2160")
+    parser.add_argument("--frames", type=int, default=MEASURE_FRAMES, help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=WARMUP_FRAMES, help="warm-up frames per scenario")
+    parser.add_argument("--baseline", help="compare against this baseline JSON and exit 1 on regressions")
+    parser.add_argument("--save-baseline", help="write the results to this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=FPS_TOLERANCE, help="allowed fractional fps drop")
+    parser.add_argument("--renderer", choices=("surface", "texture"), help="render backend (default: EGELY_RENDERER)")
+    parser.add_argument("--logical-size", help="WxH canvas scaled to each window size (default: EGELY_LOGICAL_SIZE)")
+    args = parser.parse_args(argv)
+
+    sizes = WINDOW_SIZES
+    if args.sizes:
+        sizes = [tuple(int(v) for v in s.split("x")) for s in args.sizes.split(",")]
+    logical_size = main.LOGICAL_SIZE
+    if args.logical_size:
+        logical_size = tuple(int(v) for v in args.logical_size.split("x"))
+    logging.basicConfig(level=logging.ERROR)
+    results = run_benchmarks(sizes, args.warmup, args.frames, renderer=args.renderer, logical_size=logical_size)
+
+    print(f"{'scenario':<70} {'fps':>8} {'update':>9} {'render':>9} {'surf/f':>7} {'KiB/f':>7}")
+    for name, r in results.items():
+        print(f"{name:<70} {r['fps']:8.0f} {r['update_fps']:9.0f} {r['render_fps']:9.0f} "
+              f"{r['surface_allocs_per_frame']:7.2f} {r['py_alloc_kib_per_frame']:7.2f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            status = 1
+        else:
+            print("No regressions against baseline")
+    pygame.quit()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
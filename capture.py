@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+
+import pygame
+
+CAPTURE_MAGIC = b"EGLYCAP1"
+CAPTURE_POOL_SIZE = 8  # Frame buffers; a frame is dropped when all of them wait for the writer
+CAPTURE_ZLIB_LEVEL = 1  # Fastest compression; session screens are mostly flat colour
+FRAME_HEADER = struct.Struct("<dIIII")  # seconds, width, height, pitch, compressed length
+
+# File layout: CAPTURE_MAGIC, then per frame a FRAME_HEADER and the
+# zlib-compressed pixels: `height` rows of 32-bit BGRX, `pitch` bytes apart
+# (the fourth byte is unused, read_frames() makes it opaque alpha).
+# Seconds are the session time the frame was presented at; idle screens are
+# only captured when they change, so frames are not evenly spaced.
+
+
+class FrameRecorder:
+    # Copies each presented frame into one of a fixed pool of buffers and
+    # queues it for a writer thread that compresses and appends it to `path`.
+    # capture() never waits: with every buffer queued the frame is dropped and
+    # counted. Buffers are reused, so steady recording allocates nothing.
+    def __init__(self, path, pool_size=CAPTURE_POOL_SIZE, level=CAPTURE_ZLIB_LEVEL):
+        self.path = path
+        self.level = level
+        self.free = queue.SimpleQueue()
+        for _ in range(pool_size):
+            self.free.put(bytearray())
+        self.filled = queue.SimpleQueue()  # Bounded by the pool
+        self.frames = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.file = open(path, "wb")
+        self.file.write(CAPTURE_MAGIC)
+        self.thread = threading.Thread(target=self._run, name="frame-recorder", daemon=True)
+        self.thread.start()
+
+    def capture(self, surface, seconds):
+        # Returns False when the frame was dropped
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        width, height = surface.get_size()
+        if surface.get_bitsize() == 32 and surface.get_masks()[:3] == (0xFF0000, 0xFF00, 0xFF):
+            # Display-format surfaces are copied straight from their pixel memory
+            pitch = surface.get_pitch()
+            buffer[:] = surface.get_buffer()
+        else:
+            pitch = width * 4
+            buffer[:] = pygame.image.tobytes(surface, "BGRA")
+        self.filled.put((buffer, seconds, width, height, pitch))
+        self.frames += 1
+        return True
+
+    def close(self):
+        self.filled.put(None)
+        self.thread.join()
+
+    def summary(self):
+        return {"path": self.path, "frames": self.frames, "dropped": self.dropped, "bytes": self.bytes_written}
+
+    def _run(self):
+        while True:
+            item = self.filled.get()
+            if item is None:
+                break
+            buffer, seconds, width, height, pitch = item
+            # zlib releases the GIL while compressing, so the frame loop keeps running
+            data = zlib.compress(buffer, self.level)
+            self.free.put(buffer)
+            self.file.write(FRAME_HEADER.pack(seconds, width, height, pitch, len(data)))
+            self.file.write(data)
+            self.bytes_written += FRAME_HEADER.size + len(data)
+        self.file.close()
+
+
+def read_frames(path):
+    # Yields (seconds, surface) for every frame of a recording
+    with open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"Not a recording: {path}")
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            seconds, width, height, pitch, length = FRAME_HEADER.unpack(header)
+            pixels = zlib.decompress(f.read(length))
+            if pitch != width * 4:
+                pixels = b"".join(pixels[row * pitch:row * pitch + width * 4] for row in range(height))
+            # The display surface has no alpha channel, so the fourth byte is
+            # whatever it held (usually 0); make every pixel opaque
+            pixels = bytearray(pixels)
+            pixels[3::4] = b"\xff" * (width * height)
+            yield seconds, pygame.image.frombuffer(pixels, (width, height), "BGRA")
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or export a session recording.")
+    parser.add_argument("command", choices=("info", "png", "raw"),
+                        help="info: JSON summary; png: numbered PNG files; raw: BGRA frames (opaque) on stdout")
+    parser.add_argument("recording")
+    parser.add_argument("--out", default=".", help="directory for png (default: current directory)")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        frames, sizes, last = 0, set(), 0.0
+        for seconds, surface in read_frames(args.recording):
+            frames += 1
+            sizes.add("x".join(map(str, surface.get_size())))
+            last = seconds
+        print(json.dumps({"frames": frames, "seconds": round(last, 3), "sizes": sorted(sizes)}))
+    elif args.command == "png":
+        os.makedirs(args.out, exist_ok=True)
+        for i, (seconds, surface) in enumerate(read_frames(args.recording)):
+            pygame.image.save(surface, os.path.join(args.out, f"frame_{i:06d}_{seconds * 1000:09.0f}ms.png"))
+    else:
+        # e.g. | ffmpeg -f rawvideo -pix_fmt bgr0 -s WxH -r 60 -i - session.mp4
+        for seconds, surface in read_frames(args.recording):
+            sys.stdout.buffer.write(pygame.image.tobytes(surface, "BGRA"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
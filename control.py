@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import stat
+import sys
+import time
+from collections import deque
+
+CONTROL_WRITE_TIMEOUT = 5.0  # Seconds a client's socket may stay full before it is disconnected
+CONTROL_MAX_REPLIES = 32  # Unsent replies per client; a client over this is disconnected
+CONTROL_LINE_LIMIT = 4096  # Longest request line in bytes
+CONTROL_HIGH_WATER = 64 * 1024  # Bytes buffered per client before writes wait for the socket
+CONTROL_COMMANDS = ("start", "restart", "replay")
+
+# Protocol: JSON lines both ways. Requests are
+#   {"cmd": "status" | "stats" | "start" | "restart" | "replay", "id": any, "participant": name or 1-based index}
+# where id is echoed in the reply and participant (group sessions) limits the
+# request to one session; without it, it applies to every session. Replies are
+#   {"type": "reply", "id": ..., "ok": true/false, "error": "...", "sessions": [...]}
+# with "errors" ({participant: message}) for commands refused by some sessions.
+# The server also pushes
+#   {"type": "status", "kiosk": name, "sessions": [EgelyApp.status(), ...]}
+# on connect and whenever a status changes.
+
+
+def parse_address(address):
+    # "unix:/path" -> ("unix", path), "[host:]port" -> ("tcp", (host, port)); host defaults to loopback
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+class ControlClient:
+    # One connection. Status pushes are conflated: a newer status replaces
+    # the unsent one, so a client that reads slowly gets fewer updates rather
+    # than a growing queue. Everything is written by the client's own task,
+    # which is the only place that waits on its socket; a client that does not
+    # drain within CONTROL_WRITE_TIMEOUT is disconnected.
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        writer.transport.set_write_buffer_limits(high=CONTROL_HIGH_WATER)
+        self.status = None  # Newest unsent status message
+        self.replies = deque()
+        self.wake = asyncio.Event()
+        self.closed = False
+
+    def push_status(self, message):
+        self.status = message
+        self.wake.set()
+
+    def reply(self, message):
+        if len(self.replies) >= CONTROL_MAX_REPLIES:
+            self.close()
+            return
+        self.replies.append(encode(message))
+        self.wake.set()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.wake.set()
+            self.writer.transport.abort()
+
+    async def write_loop(self):
+        try:
+            while not self.closed:
+                await self.wake.wait()
+                self.wake.clear()
+                batch = list(self.replies)
+                self.replies.clear()
+                if self.status is not None:
+                    batch.append(self.status)
+                    self.status = None
+                if batch and not self.closed:
+                    self.writer.write(b"".join(batch))
+                    await asyncio.wait_for(self.writer.drain(), CONTROL_WRITE_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.close()
+
+    async def read_loop(self):
+        try:
+            while not self.closed:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request is not an object")
+                except ValueError as e:
+                    self.reply({"type": "reply", "id": None, "ok": False, "error": f"Bad request: {e}"})
+                    continue
+                self.reply(self.server.handle(request))
+                # Let the frame loop and other clients in after every request,
+                # so a client sending faster cannot hold the loop
+                await asyncio.sleep(0)
+        except (ValueError, ConnectionError):
+            pass  # Over-long line or reset connection
+        finally:
+            self.close()
+
+
+class ControlServer:
+    # Operator control socket, served from the app's own asyncio loop so
+    # requests are handled on the thread that owns the app while main()
+    # sleeps between frames. sessions are the EgelyApps (one, or a group's
+    # participants). publish() is called once per frame and costs one status()
+    # per session while a client is connected and nothing when none is.
+    # Socket writes never block the frame loop: each client is written by its
+    # own task (see ControlClient).
+    def __init__(self, sessions, kiosk=None):
+        self.sessions = sessions
+        self.kiosk = kiosk or socket.gethostname()
+        self.clients = set()
+        self.statuses = None  # Last published
+        self.server = None
+        self.path = None  # Unix socket file, removed on close()
+        self.inode = None
+
+    async def start(self, address):
+        kind, where = parse_address(address)
+        if kind == "unix":
+            # A socket file left by a previous run would make the bind fail
+            if os.path.exists(where) and stat.S_ISSOCK(os.stat(where).st_mode):
+                os.unlink(where)
+            self.server = await asyncio.start_unix_server(self.serve, where, limit=CONTROL_LINE_LIMIT)
+            self.path = where
+            self.inode = os.stat(where).st_ino
+        else:
+            self.server = await asyncio.start_server(self.serve, *where, limit=CONTROL_LINE_LIMIT)
+        return self.server
+
+    async def close(self):
+        for client in list(self.clients):
+            client.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        # Unless another instance has replaced the socket file since
+        if self.path is not None and os.path.exists(self.path) and os.stat(self.path).st_ino == self.inode:
+            os.unlink(self.path)
+
+    async def serve(self, reader, writer):
+        client = ControlClient(self, reader, writer)
+        self.clients.add(client)
+        client.push_status(self.status_message())
+        writing = asyncio.ensure_future(client.write_loop())
+        try:
+            await client.read_loop()
+        finally:
+            self.clients.discard(client)
+            await writing
+
+    def status_message(self, statuses=None):
+        statuses = statuses or [app.status() for app in self.sessions]
+        return encode({"type": "status", "kiosk": self.kiosk, "sessions": statuses})
+
+    def publish(self):
+        if not self.clients:
+            self.statuses = None
+            return
+        statuses = [app.status() for app in self.sessions]
+        if statuses != self.statuses:
+            self.statuses = statuses
+            message = self.status_message(statuses)
+            for client in self.clients:
+                client.push_status(message)
+
+    def select(self, participant):
+        # Sessions a request applies to
+        if participant is None:
+            return self.sessions
+        if isinstance(participant, int) and not isinstance(participant, bool):
+            return self.sessions[participant - 1:participant] if participant > 0 else []
+        return [app for app in self.sessions if app.participant == participant]
+
+    def handle(self, request):
+        cmd = request.get("cmd")
+        reply = {"type": "reply", "id": request.get("id"), "ok": True}
+        sessions = self.select(request.get("participant"))
+        if not sessions:
+            reply.update(ok=False, error=f"No participant {request.get('participant')!r}")
+        elif cmd == "status":
+            reply["sessions"] = [app.status() for app in sessions]
+        elif cmd == "stats":
+            reply["sessions"] = [{"participant": app.participant, "fps": round(app.clock.get_fps(), 1),
+                                  "frame_times": app.frame_time_summary()} for app in sessions]
+        elif cmd in CONTROL_COMMANDS:
+            errors = {}
+            for app in sessions:
+                error = app.command(cmd)
+                if error is not None:
+                    errors[app.participant] = error
+            if errors:
+                reply.update(ok=False, error="; ".join(errors.values()), errors=errors)
+        else:
+            reply.update(ok=False, error=f"Unknown command: {cmd!r}")
+        return reply
+
+
+async def run_client(address, commands, participant=None, watch=False, stall=False, timing=False, out=sys.stdout):
+    # Stand-in operator console: sends each command, printing every message
+    # received until its reply, then keeps printing status pushes if watch.
+    # With stall it connects and never reads, to exercise backpressure; with
+    # timing the connect and every round trip are timed on stderr.
+    started = time.perf_counter()
+    kind, where = parse_address(address)
+    if kind == "unix":
+        reader, writer = await asyncio.open_unix_connection(where)
+    else:
+        reader, writer = await asyncio.open_connection(*where)
+    if timing:
+        print(f"connect: {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+    try:
+        if stall:
+            await asyncio.Event().wait()
+        for i, cmd in enumerate(commands, 1):
+            request = {"cmd": cmd, "id": i}
+            if participant is not None:
+                request["participant"] = int(participant) if participant.isdigit() else participant
+            sent = time.perf_counter()
+            writer.write(encode(request))
+            await writer.drain()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return 1
+                out.write(line.decode())
+                out.flush()
+                message = json.loads(line)
+                if message.get("type") == "reply" and message.get("id") == i:
+                    if timing:
+                        print(f"{cmd}: {(time.perf_counter() - sent) * 1000:.1f} ms", file=sys.stderr)
+                    if not message["ok"]:
+                        return 1
+                    break
+        while watch or not commands:
+            line = await reader.readline()
+            if not line:
+                break
+            out.write(line.decode())
+            out.flush()
+            if not watch:
+                break
+        return 0
+    finally:
+        writer.close()
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Query or command a running Egely Wheel app over its control socket.")
+    parser.add_argument("address", help="unix:/path or [host:]port, as in EGELY_CONTROL")
+    parser.add_argument("commands", nargs="*", help="status, stats, " + ", ".join(CONTROL_COMMANDS) +
+                        "; with none, prints the current status")
+    parser.add_argument("--participant", help="name or 1-based index of one session of a group")
+    parser.add_argument("--watch", action="store_true", help="keep printing status changes")
+    parser.add_argument("--stall", action="store_true", help="connect and never read (backpressure test)")
+    parser.add_argument("--timing", action="store_true", help="print connect and round-trip times to stderr")
+    args = parser.parse_args(argv)
+    try:
+        return asyncio.run(run_client(args.address, args.commands, args.participant, args.watch, args.stall,
+                                      args.timing))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
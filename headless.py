@@ -0,0 +1,128 @@
+import os
+
+# Headless runs use SDL's dummy drivers; set them before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+
+import pygame
+
+import main
+
+# Default input script: (state, seconds spent in that state, key). Each entry
+# fires once per visit of the state, so it repeats for every round/session.
+DEFAULT_SCRIPT = [
+    (main.STATE_STARTUP, 0.5, "space"),  # Start
+    (main.STATE_INSTRUCTION, 3.0, "space"),  # Replay the instruction
+    (main.STATE_END, 1.0, "return"),  # Restart
+]
+
+KEYS = {
+    "space": pygame.K_SPACE,
+    "return": pygame.K_RETURN,
+    "escape": pygame.K_ESCAPE,
+}
+
+
+class SimulatedClock:
+    # Stand-in for pygame.time.Clock that advances a fixed amount per tick
+    # without sleeping, so sessions run as fast as the CPU allows
+    def __init__(self, frame_time=1 / main.FPS):
+        self.frame_time = frame_time
+        self.time = 0.0
+
+    def tick(self, framerate=0):
+        self.time += self.frame_time
+        return self.frame_time * 1000
+
+    def now(self):
+        # Simulated wall clock for audio cue scheduling; cue start latency is
+        # only measured against the real clock
+        return self.time
+
+    def get_fps(self):
+        return 1 / self.frame_time
+
+
+class ScriptedInput:
+    # Feeds key presses to the app when it has been in a state long enough
+    def __init__(self, script=DEFAULT_SCRIPT):
+        self.script = [(state, delay, KEYS[key]) for state, delay, key in script]
+        self.visit = None
+        self.entered = 0.0
+        self.fired = set()
+
+    def feed(self, app):
+        visit = (app.state, app.round)
+        if visit != self.visit:
+            self.visit = visit
+            self.entered = app.sim_time
+            self.fired = set()
+        for index, (state, delay, key) in enumerate(self.script):
+            if state == app.state and index not in self.fired and app.sim_time - self.entered >= delay:
+                self.fired.add(index)
+                app.handle_event(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+
+
+def run_sessions(app, sessions, script=DEFAULT_SCRIPT, render=False, max_frames=None):
+    # Drives the state machine until `sessions` games have reached the end
+    # screen. Returns the number of frames run.
+    inputs = ScriptedInput(script)
+    completed = []
+    app.listeners.append(lambda e: completed.append(e) if e["event"] == "state" and e["state"] == main.STATE_END else None)
+    frames = 0
+    while app.running and len(completed) < sessions:
+        if max_frames is not None and frames >= max_frames:
+            break
+        frame_time = app.clock.tick(main.FPS) / 1000
+        app.handle_events()
+        inputs.feed(app)
+        app.advance(frame_time)
+        if render:
+            app.render()
+        frames += 1
+    return frames
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Run Egely Wheel sessions headless and faster than real time.")
+    parser.add_argument("--sessions", type=int, default=1, help="number of full 4-round sessions to run")
+    parser.add_argument("--seed", type=int, default=0, help="seed for round order, prompts and directions")
+    parser.add_argument("--frame-time", type=float, default=1 / main.FPS, help="simulated seconds per frame")
+    parser.add_argument("--script", help="JSON file with [state, delay, key] entries replacing the default input script")
+    parser.add_argument("--render", action="store_true", help="also render every frame to the dummy display")
+    parser.add_argument("--log", help="write state transitions, audio cues and inputs as JSON lines to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the app's info log messages")
+    args = parser.parse_args(argv)
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script) as f:
+            script = [tuple(entry) for entry in json.load(f)]
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, format="%(levelname)s %(message)s")
+    log_file = open(args.log, "w") if args.log else None
+    start = time.perf_counter()
+    app = main.EgelyApp(clock=SimulatedClock(args.frame_time), rng=random.Random(args.seed))
+    if log_file:
+        app.listeners.append(lambda e: log_file.write(json.dumps(e) + "\n"))
+    app.reset_game()
+    frames = run_sessions(app, args.sessions, script, args.render)
+    app.stop_recording()
+    elapsed = time.perf_counter() - start
+    if log_file:
+        log_file.close()
+    print(f"{args.sessions} sessions, {frames} frames, {app.sim_time:.1f} s simulated in {elapsed:.1f} s "
+          f"({app.sim_time / max(elapsed, 1e-9):.0f}x real time)")
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,130 @@
+import sqlite3
+import time
+
+HISTORY_PAGE_SIZE = 8  # Sessions per page on the history screen
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    participant TEXT NOT NULL,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    eliminated TEXT,
+    rounds_scored INTEGER NOT NULL,
+    rounds_passed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_participant ON sessions (participant, id);
+CREATE TABLE IF NOT EXISTS rounds (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    round INTEGER NOT NULL,
+    instruction TEXT NOT NULL,
+    started REAL,
+    passed INTEGER,
+    result TEXT,
+    net_degrees REAL,
+    peak_speed REAL,
+    PRIMARY KEY (session_id, round)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rounds_instruction ON rounds (instruction);
+CREATE TABLE IF NOT EXISTS participant_stats (
+    participant TEXT PRIMARY KEY,
+    sessions INTEGER NOT NULL,
+    rounds_scored INTEGER NOT NULL,
+    rounds_passed INTEGER NOT NULL,
+    last_session REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS round_type_stats (
+    participant TEXT NOT NULL,
+    instruction TEXT NOT NULL,
+    rounds INTEGER NOT NULL,
+    rounds_scored INTEGER NOT NULL,
+    rounds_passed INTEGER NOT NULL,
+    PRIMARY KEY (participant, instruction)
+) WITHOUT ROWID;
+"""
+
+
+class SessionHistory:
+    # Completed sessions in a local SQLite database. The participant_stats and
+    # round_type_stats tables are updated in the same transaction as each
+    # insert, so the stats screen reads a handful of rows however long the
+    # history is; sessions are paged newest first by id.
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def add_session(self, participant, started, eliminated, rounds):
+        # rounds is a list of dicts with "instruction", "started" and, when
+        # scored, "passed", "result", "net_degrees" and "peak_speed"
+        scored = sum(1 for r in rounds if r.get("passed") is not None)
+        passed = sum(1 for r in rounds if r.get("passed"))
+        ended = time.time()
+        with self.db:
+            session_id = self.db.execute(
+                "INSERT INTO sessions (participant, started, ended, eliminated, rounds_scored, rounds_passed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (participant, started, ended, eliminated, scored, passed)).lastrowid
+            self.db.executemany(
+                "INSERT INTO rounds (session_id, round, instruction, started, passed, result, net_degrees, peak_speed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(session_id, i, r["instruction"], r.get("started"), r.get("passed"), r.get("result"),
+                  r.get("net_degrees"), r.get("peak_speed")) for i, r in enumerate(rounds, 1)])
+            self.db.execute(
+                "INSERT INTO participant_stats VALUES (?, 1, ?, ?, ?)"
+                " ON CONFLICT (participant) DO UPDATE SET sessions = sessions + 1,"
+                " rounds_scored = rounds_scored + excluded.rounds_scored,"
+                " rounds_passed = rounds_passed + excluded.rounds_passed, last_session = excluded.last_session",
+                (participant, scored, passed, ended))
+            self.db.executemany(
+                "INSERT INTO round_type_stats VALUES (?, ?, 1, ?, ?)"
+                " ON CONFLICT (participant, instruction) DO UPDATE SET rounds = rounds + 1,"
+                " rounds_scored = rounds_scored + excluded.rounds_scored,"
+                " rounds_passed = rounds_passed + excluded.rounds_passed",
+                [(participant, r["instruction"], int(r.get("passed") is not None), int(bool(r.get("passed"))))
+                 for r in rounds])
+        return session_id
+
+    def participant_stats(self, participant):
+        # {"sessions", "rounds_scored", "rounds_passed", "last_session"} or None
+        row = self.db.execute(
+            "SELECT sessions, rounds_scored, rounds_passed, last_session FROM participant_stats WHERE participant = ?",
+            (participant,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("sessions", "rounds_scored", "rounds_passed", "last_session"), row))
+
+    def round_type_stats(self, participant=None):
+        # [(instruction, rounds, rounds_scored, rounds_passed)] for one or all participants
+        if participant is None:
+            return self.db.execute(
+                "SELECT instruction, SUM(rounds), SUM(rounds_scored), SUM(rounds_passed) FROM round_type_stats"
+                " GROUP BY instruction ORDER BY instruction").fetchall()
+        return self.db.execute(
+            "SELECT instruction, rounds, rounds_scored, rounds_passed FROM round_type_stats"
+            " WHERE participant = ? ORDER BY instruction", (participant,)).fetchall()
+
+    def page(self, participant, before_id=None, limit=HISTORY_PAGE_SIZE):
+        # Up to `limit` sessions older than before_id, newest first, as dicts
+        # with their rounds; only this page is read from the database
+        if before_id is None:
+            before_id = 1 << 62
+        sessions = self.db.execute(
+            "SELECT id, started, ended, eliminated, rounds_scored, rounds_passed FROM sessions"
+            " WHERE participant = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (participant, before_id, limit)).fetchall()
+        page = [dict(zip(("id", "started", "ended", "eliminated", "rounds_scored", "rounds_passed"), row), rounds=[])
+                for row in sessions]
+        if page:
+            by_id = {s["id"]: s for s in page}
+            marks = ",".join("?" * len(page))
+            for session_id, instruction, passed, result in self.db.execute(
+                    f"SELECT session_id, instruction, passed, result FROM rounds WHERE session_id IN ({marks})"
+                    " ORDER BY session_id, round", list(by_id)):
+                by_id[session_id]["rounds"].append((instruction, passed, result))
+        return page
+
+    def close(self):
+        self.db.close()
@@ -4,6 +4,26 @@ import pygame
 import sys
 import random
 import os
+import time
+import queue
+import itertools
+import threading
+import json
+import csv
+import logging
+import cProfile
+import pstats
+import re
+import tracemalloc
+from collections import OrderedDict, deque
+
+from asset_bundle import BUNDLE_NAME, open_bundle
+from capture import FrameRecorder
+from history import HISTORY_PAGE_SIZE, SessionHistory
+
+PROCESS_START = time.perf_counter()  # Reference point for the startup timings
+
+log = logging.getLogger("egely")
 
 # Helper to find resources in PyInstaller bundle or dev
 def resource_path(relative_path):
@@ -11,8 +31,32 @@ def resource_path(relative_path):
         return os.path.join(sys._MEIPASS, relative_path)
     return os.path.join(os.path.abspath('.'), relative_path)
 
+# Helper for files the app writes (stats, logs); EGELY_DATA_DIR overrides the working directory
+def output_path(relative_path):
+    path = os.path.join(os.environ.get("EGELY_DATA_DIR", os.path.abspath('.')), relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
 # Constants
 FPS = 60
+SIM_DT = 1 / 60  # Fixed simulation step in seconds, independent of the frame rate
+MAX_FRAME_TIME = 0.25  # Longest real frame time fed to the simulation (avoids a catch-up spiral)
+# Adaptive pacing: full FPS while something animates, IDLE_FPS while only
+# timers run, and blocking on input (up to IDLE_WAIT_SECONDS) on settled
+# static screens. Browsers cannot block, so they use IDLE_FPS instead.
+IDLE_FPS = 10
+IDLE_WAIT_SECONDS = 0.5
+IDLE_WAIT_ENABLED = platform.system() != "Emscripten"
+# While main() serves the control socket, idle screens block on input for
+# at most IDLE_POLL_SECONDS at a time, and pending requests are then handled
+# for up to IDLE_SERVE_SECONDS before the next wait
+IDLE_POLL_SECONDS = 0.1
+IDLE_SERVE_SECONDS = 0.005
+BUTTON_SETTLE = 0.002  # Button scale this close to its target counts as settled
+INSTRUCTION_SECONDS = 20
+ATTEMPT_SECONDS = 12
+ATTEMPT_END_WAIT_SECONDS = 2
+DIRECTION_SWITCH_SECONDS = 4  # Direction change interval for 'Spin Clockwise or Counter Clockwise'
 WINDOW_SIZE = (800, 600)
 BG_COLOR = (245, 245, 245)
 TEXT_COLOR = (30, 30, 30)
@@ -20,11 +64,75 @@ BUTTON_COLOR = (76, 175, 80)
 BUTTON_HOVER_COLOR = (56, 142, 60)
 BUTTON_TEXT_COLOR = (255, 255, 255)
 TIMER_COLOR = (33, 150, 243)
+RESULT_PASS_COLOR = (46, 125, 50)
+RESULT_FAIL_COLOR = (198, 40, 40)
+TIMER_PULSE_MIN = 0.92  # Timer text scale range for the pulse animation
+TIMER_PULSE_MAX = 1.08
+FONT_NAME = "Arial"
+TEXT_CACHE_MAX_ENTRIES = 256  # Rendered text surfaces kept before the least recently used is dropped
+LOADER_WORKERS = 4  # Threads decoding images and audio at startup
+# Browser builds have no threads: assets are decoded on the main thread a
+# file at a time between frames instead
+THREADS_ENABLED = platform.system() != "Emscripten"
+# Pre-decoded images and audio packed by asset_bundle.py; loose files are used without it
+ASSET_BUNDLE_ENABLED = os.environ.get("EGELY_ASSET_BUNDLE", "1") != "0"
+
+# Frame-time instrumentation (F3 toggles the overlay; EGELY_FRAME_STATS=1 collects from startup)
+FRAME_STATS_ENABLED = os.environ.get("EGELY_FRAME_STATS") == "1"
+FRAME_STATS_WINDOW = 3600  # Frames kept per state for the rolling percentiles
+FRAME_STATS_STAGES = ("events", "update", "render", "flip", "tick_wait", "frame")
+FRAME_STATS_OVERLAY_INTERVAL = 0.25  # Seconds between overlay refreshes
+RECENT_FRAMES = 600  # Frames in the always-on window served as the control socket's stats
+DROPPED_FRAME_FACTOR = 1.5  # A frame longer than this many frame budgets counts as dropped
+
+# Profiler capture (F9 starts and stops it). EGELY_PROFILE=<frames> captures
+# from startup, EGELY_PROFILE=<frames>@<state> from the first time that state
+# is entered, e.g. 600@attempt.
+PROFILE_TRIGGER = os.environ.get("EGELY_PROFILE", "")
+PROFILE_FRAMES = 600  # Frames captured per F9 press
+PROFILE_TRACE_DEPTH = 1  # tracemalloc frames kept per allocation; sites are single lines
+PROFILE_TOP = 8  # Functions and allocation sites listed in the overlay
+
+# Session event log (EGELY_EVENT_LOG=0 disables it) and console logging
+EVENT_LOG_ENABLED = os.environ.get("EGELY_EVENT_LOG", "1") != "0"
+EVENT_LOG_FSYNC_SECONDS = 1.0  # Longest time a written event waits before it is synced to disk
+EVENT_LOG_BATCH = 256  # Events written per batch at most
+LOG_LEVEL = os.environ.get("EGELY_LOG_LEVEL", "INFO").upper()
+HISTORY_ENABLED = os.environ.get("EGELY_HISTORY", "1") != "0"  # Completed sessions saved to history.sqlite3
+PARTICIPANT = os.environ.get("EGELY_PARTICIPANT", "anonymous")  # Name sessions are stored and summarised under
+SENSOR_SOURCE = os.environ.get("EGELY_SENSOR")  # Serial port, file, pipe or pty with wheel samples (see sensor.py)
+# Session recordings (see capture.py); the start screen's Record button or R
+# toggles them per session, EGELY_CAPTURE=1 turns them on from startup
+CAPTURE_ENABLED = os.environ.get("EGELY_CAPTURE") == "1"
+# Operator control socket (see control.py), off unless set:
+# EGELY_CONTROL=unix:/run/egely.sock or [host:]port (host defaults to loopback).
+# EGELY_KIOSK names this kiosk in status messages (default: host name).
+CONTROL_ADDRESS = os.environ.get("EGELY_CONTROL")
+KIOSK_NAME = os.environ.get("EGELY_KIOSK")
+# Group sessions: EGELY_GROUP=Ann,Bob,Cid runs one session per name side by
+# side in one window (see GroupApp); EGELY_SENSOR then takes one source per
+# name, comma separated
+GROUP = [name.strip() for name in os.environ.get("EGELY_GROUP", "").split(",") if name.strip()]
+GROUP_BORDER_COLOR = (200, 200, 200)
+GROUP_BORDER = 4  # Pixels between viewports
+# Caches and the loader are shared by every participant of a group
+SHARED_RESOURCES = ("bundle", "fonts", "font", "small_font", "text_cache", "button_surfaces", "assets",
+                    "rotation_cache", "loader", "audio", "audio_files")
+
+# Audio cues play on reserved mixer channels, one per cue type. Cues due
+# within the lookahead are handed to the mixer early behind a silence pad so
+# they start on time even if a frame is late.
+AUDIO_CUE_CHANNELS = {"instruction": 0, "warning": 1, "begin": 2, "stop": 3, "end": 4}
+AUDIO_LOOKAHEAD_SECONDS = 0.25
+TEN_SECOND_CUE_AT = INSTRUCTION_SECONDS - 11  # Instruction phase time when the countdown first shows 10s
 ROUND_TOTAL = 4  # We'll show 4 rounds, randomly selected from 5 possible rounds
 
-# Image size constants for each round and phase
+# Image size constants for each round and phase. Sizes are in pixels for a
+# window of LAYOUT_REFERENCE_SIZE and are scaled with the actual window size.
+LAYOUT_REFERENCE_SIZE = (1440, 900)
+
 # Regular instruction images size (for rounds without special handling)
-INSTRUCTION_IMAGE_SIZE = (300, 300)
+INSTRUCTION_IMAGE_SIZE = (400, 400)
 
 # Sizes for the black wheel in different contexts
 WHEEL_SIZE = {
@@ -46,28 +154,31 @@ GREEN_ARROW_SIZE = {
     "attempt": (500, 500)
 }
 
+# Rotation cache for the attempt-phase arrows
+ROTATION_ANGLE_STEP = 1.0  # Degrees between cached frames (e.g. 1.0 or 0.5)
+ROTATION_QUALITY = "smooth"  # "smooth" (filtered rotozoom) or "nearest" (nearest-neighbour rotate)
+ROTATION_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Memory cap for all cached frames
+ROTATION_PREWARM_PER_FRAME = 2  # Frames built ahead of time per instruction-phase frame
+# Render backend chosen at startup: "surface" (pygame Surfaces, LayeredRenderer)
+# or "texture" (SDL2 Renderer/Textures, TextureRenderer). SDL_RENDER_DRIVER
+# picks the SDL renderer, e.g. "software", "opengl" or "direct3d".
+RENDER_BACKEND = os.environ.get("EGELY_RENDERER", "surface")
+TEXTURE_CACHE_MAX_ENTRIES = 256  # Uploaded sprite textures kept before the least recently used is dropped
+WINDOW_TITLE = "Egely Wheel - Spin Control"
+# Optional fixed canvas, e.g. EGELY_LOGICAL_SIZE=1280x720: the scene is laid
+# out and drawn at this size whatever the display, then scaled to the window
+# in one pass by SDL (letterboxed, mouse positions mapped back)
+LOGICAL_SIZE = (tuple(int(v) for v in os.environ["EGELY_LOGICAL_SIZE"].split("x"))
+                if os.environ.get("EGELY_LOGICAL_SIZE") else None)
+
 # Asset filenames (update as needed)
-INSTRUCTION_IMAGES = [
-    "egely wheel graphic clockwise .png",
-    "egely wheel counter clockwise .png",
-    "Egely Wheel Graphic both directions.png",
-    "Egely wheel no background graphic counter clockwise.png",
-    "light_blue_arrows_transparent.png"  # New image for 5th round
-]
-INSTRUCTIONS = [
-    "Spin Clockwise",
-    "Spin Counter Clockwise",
-    "Spin Clockwise or Counter Clockwise",
-    "Spin Fast in Either Direction",
-    "Spin Clockwise then Counter Clockwise"  # New instruction for 5th round
-]
-INSTRUCTION_AUDIO = [
-    "spin clockwise.mp3",
-    "spin counter clockwise.mp3",
-    "spin clockwise or counter clockwise.mp3",
-    "Spin fast in either direction.mp3",
-    "spin clockwise 1 to roations then anti clockwise 1 to 2 rotations.mp3"  # New audio for 5th round
-]
+# Special images and the EgelyApp attributes they are kept in
+SPECIAL_IMAGES = {
+    "black_egely_wheel_only.png": "wheel_bg_img",
+    "green_arrow_clockwise.png": "arrow_cw_img",
+    "green_arrow_anticlockwise.png": "arrow_ccw_img",
+    "light_blue_arrows_transparent.png": "blue_arrows_img"
+}
 # Additional audio files
 ADDITIONAL_AUDIO = [
     "begin.mp3",
@@ -82,6 +193,87 @@ STATE_INSTRUCTION = "instruction"
 STATE_ATTEMPT = "attempt"
 STATE_ATTEMPT_END_WAIT = "attempt_end_wait"  # New state for 2s wait after attempt
 STATE_END = "end"
+STATE_HISTORY = "history"  # Past sessions and stats, opened from the end screen
+
+# Still images drawn per phase for each layer set, as (asset name, size);
+# None stands for the round's own instruction image
+ROUND_LAYER_SETS = {
+    "image": {
+        STATE_STARTUP: [(None, INSTRUCTION_IMAGE_SIZE)],
+        STATE_INSTRUCTION: [(None, INSTRUCTION_IMAGE_SIZE)],
+        STATE_ATTEMPT: [("black_egely_wheel_only.png", WHEEL_SIZE["attempt"])],
+    },
+    "wheel": {
+        STATE_STARTUP: [("black_egely_wheel_only.png", WHEEL_SIZE["startup"]),
+                        ("light_blue_arrows_transparent.png", BLUE_ARROWS_SIZE["startup"])],
+        STATE_INSTRUCTION: [("black_egely_wheel_only.png", WHEEL_SIZE["instruction"]),
+                            ("light_blue_arrows_transparent.png", BLUE_ARROWS_SIZE["instruction"])],
+        STATE_ATTEMPT: [("black_egely_wheel_only.png", WHEEL_SIZE["attempt"])],
+    },
+}
+
+# Round types. "arrow" is the image rotated during the attempt phase,
+# "speed" is in deg/sec and "direction" is 1 (clockwise), -1 or "random".
+# "score" is the scoring.OBJECTIVES entry the wheel's motion is judged by.
+# Optional: "switch_every" reverses the direction every so many seconds,
+# "reverse_after" reverses it after turning that many degrees.
+ROUND_SPECS = [
+    {
+        "instruction": "Spin Clockwise",
+        "image": "egely wheel graphic clockwise .png",
+        "audio": "spin clockwise.mp3",
+        "layers": "image",
+        "arrow": ("green_arrow_clockwise.png", GREEN_ARROW_SIZE["attempt"]),
+        "score": "clockwise",
+        "speed": 60,
+        "direction": 1,
+    },
+    {
+        "instruction": "Spin Counter Clockwise",
+        "image": "egely wheel counter clockwise .png",
+        "audio": "spin counter clockwise.mp3",
+        "layers": "image",
+        "arrow": ("green_arrow_anticlockwise.png", GREEN_ARROW_SIZE["attempt"]),
+        "score": "counter_clockwise",
+        "speed": 60,
+        "direction": -1,
+    },
+    {
+        "instruction": "Spin Clockwise or Counter Clockwise",
+        "image": "Egely Wheel Graphic both directions.png",
+        "audio": "spin clockwise or counter clockwise.mp3",
+        "layers": "wheel",
+        "arrow": ("light_blue_arrows_transparent.png", BLUE_ARROWS_SIZE["attempt"]),
+        "score": "either",
+        "speed": 60,
+        "direction": 1,
+        "switch_every": DIRECTION_SWITCH_SECONDS,
+    },
+    {
+        "instruction": "Spin Fast in Either Direction",
+        "image": "Egely wheel no background graphic counter clockwise.png",
+        "audio": "Spin fast in either direction.mp3",
+        "layers": "wheel",
+        "arrow": ("light_blue_arrows_transparent.png", BLUE_ARROWS_SIZE["attempt"]),
+        "score": "fast",
+        "speed": 150,
+        "direction": "random",
+    },
+    {
+        "instruction": "Spin Clockwise then Counter Clockwise",
+        "image": "light_blue_arrows_transparent.png",
+        "audio": "spin clockwise 1 to roations then anti clockwise 1 to 2 rotations.mp3",
+        "layers": "wheel",
+        "arrow": ("light_blue_arrows_transparent.png", BLUE_ARROWS_SIZE["attempt"]),
+        "score": "reversal",
+        "speed": 60,
+        "direction": 1,
+        "reverse_after": 360,  # One full turn each way
+    },
+]
+INSTRUCTIONS = [spec["instruction"] for spec in ROUND_SPECS]
+INSTRUCTION_IMAGES = [spec["image"] for spec in ROUND_SPECS]
+INSTRUCTION_AUDIO = [spec["audio"] for spec in ROUND_SPECS]
 
 # Motivational prompts for attempt phase
 MOTIVATIONAL_PROMPTS = [
@@ -108,501 +300,2027 @@ MOTIVATIONAL_PROMPTS = [
     "Let your mind and the wheel become one!"
 ]
 
-class EgelyApp:
+class AssetLoader:
+    # Decodes images and sounds on a small pool of worker threads. Jobs run in
+    # priority order (lower first) and every file is read from disk only once;
+    # finished names are handed back to the main thread through poll().
+    # Anything in the asset bundle, when there is one, is taken from it instead.
+    # With no workers (no threads), ready(), wait() and poll() decode pending
+    # jobs on the calling thread, one file per poll().
+    def __init__(self, workers=LOADER_WORKERS if THREADS_ENABLED else 0, bundle=None):
+        self.workers = workers
+        self.bundle = bundle
+        self.jobs = queue.PriorityQueue()
+        self.finished = queue.SimpleQueue()
+        self.kinds = {}  # name -> "image" or "sound"
+        self.done = {}  # name -> threading.Event set once decoded
+        self.results = {}
+        self.started = set()
+        self.lock = threading.Lock()
+        self.order = itertools.count()
+        self.threads = []
+
+    def request(self, name, kind, priority=1):
+        if name not in self.kinds:
+            self.kinds[name] = kind
+            self.done[name] = threading.Event()
+        self.jobs.put((priority, next(self.order), name))
+        self.threads = [t for t in self.threads if t.is_alive()]
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._work, name="asset-loader", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def prioritize(self, names, priority=0):
+        # Move still-pending jobs ahead of the queue; the stale entries are skipped
+        for name in names:
+            if name in self.kinds and not self.done[name].is_set():
+                self.request(name, self.kinds[name], priority)
+
+    def ready(self, names):
+        if not self.workers:
+            self._work(1)
+        return all(self.done[name].is_set() for name in names)
+
+    def wait(self, name):
+        self.prioritize([name])
+        while not self.workers and not self.done[name].is_set():
+            self._work(1)
+        self.done[name].wait()
+        return self.results.get(name)
+
+    def progress(self):
+        return sum(event.is_set() for event in self.done.values()), len(self.done)
+
+    def poll(self):
+        # Names decoded since the last call
+        if not self.workers:
+            self._work(1)
+        names = []
+        while True:
+            try:
+                names.append(self.finished.get_nowait())
+            except queue.Empty:
+                return names
+
+    def _work(self, limit=None):
+        # Decode jobs until the queue is empty or `limit` files are done
+        while limit is None or limit > 0:
+            try:
+                _, _, name = self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            with self.lock:
+                if name in self.started:
+                    continue
+                self.started.add(name)
+            if limit is not None:
+                limit -= 1
+            path = resource_path(name)
+            result = None
+            if self.bundle is not None:
+                result = self.bundle.image(name) if self.kinds[name] == "image" else self.bundle.sound(name)
+            if result is None and os.path.exists(path):
+                if self.kinds[name] == "image":
+                    result = pygame.image.load(path)
+                else:
+                    result = pygame.mixer.Sound(path)
+            self.results[name] = result
+            self.done[name].set()
+            self.finished.put(name)
+
+class RoundPlan:
+    # A ROUND_SPECS entry compiled once per game: layer sets resolved to asset
+    # names and sizes and the direction policy reduced to numbers, so the
+    # frame loop only reads attributes
+    def __init__(self, spec):
+        self.instruction = spec["instruction"]
+        self.image_file = spec["image"]
+        self.audio_file = spec["audio"]
+        self.layers = {phase: [(name or self.image_file, size) for name, size in layers]
+                       for phase, layers in ROUND_LAYER_SETS[spec["layers"]].items()}
+        self.arrow_name, self.arrow_size = spec["arrow"]
+        self.speed = spec["speed"]
+        self.direction = spec["direction"]
+        self.switch_every = spec.get("switch_every")
+        self.reverse_after = spec.get("reverse_after")
+        self.objective = spec["score"]
+
+class AssetCache:
+    # Scaled copies of the loaded images keyed by (asset name, target size).
+    # Each one is built once from the original and converted to the display
+    # format; the whole cache is dropped when the window size changes. Sizes
+    # the asset bundle has pre-scaled are taken from it as they are.
+    def __init__(self, window_size, bundle=None):
+        self.bundle = bundle
+        self.originals = {}
+        self.scaled = {}
+        self.window_size = None
+        self.scale = 1.0
+        self.set_window_size(window_size)
+
+    def add(self, name, image):
+        self.originals[name] = image
+        return image
+
+    def set_window_size(self, window_size):
+        # Returns True when the size changed and cached surfaces were dropped
+        if window_size == self.window_size:
+            return False
+        self.window_size = window_size
+        self.scale = min(window_size[0] / LAYOUT_REFERENCE_SIZE[0], window_size[1] / LAYOUT_REFERENCE_SIZE[1])
+        self.scaled.clear()
+        return True
+
+    def size_for(self, base_size):
+        return (max(1, round(base_size[0] * self.scale)), max(1, round(base_size[1] * self.scale)))
+
+    def get(self, name, base_size):
+        # base_size is an entry from the size tables above
+        size = self.size_for(base_size)
+        surf = self.scaled.get((name, size))
+        if surf is None and self.bundle is not None:
+            surf = self.bundle.image(name, size)
+            if surf is not None:
+                self.scaled[(name, size)] = surf
+        if surf is None:
+            original = self.originals.get(name)
+            if original is None:
+                return None
+            surf = pygame.transform.smoothscale(original.convert_alpha(), size)
+            self.scaled[(name, size)] = surf
+        return surf
+
+class FontRegistry:
+    # SysFont does a system font lookup and load, so each size is loaded once
+    def __init__(self, name=FONT_NAME):
+        self.name = name
+        self.fonts = {}
+
+    def get(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.SysFont(self.name, size)
+            self.fonts[size] = font
+        return font
+
+    def preload(self, sizes):
+        for size in sizes:
+            self.get(size)
+
+class TextCache:
+    # Rendered text surfaces keyed by (text, font, colour) with LRU eviction
+    def __init__(self, max_entries=TEXT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+
+    def render(self, text, font, color):
+        key = (text, font, color)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            return surf
+        surf = font.render(text, True, color)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surf
+
+class RotationCache:
+    # Pre-rotated frames keyed by (asset key, display size, angle index).
+    # Frames are built lazily on first use or ahead of time with prewarm(), and
+    # are stored until the memory cap is reached. Each frame is cropped to its
+    # visible pixels and kept with its offset from the rotation centre. Once an
+    # asset's frames fill the cap (large displays), its uncached angles are
+    # drawn with one plain rotate per frame instead of building frames that
+    # cannot be kept.
+    def __init__(self, angle_step=ROTATION_ANGLE_STEP, quality=ROTATION_QUALITY, max_bytes=ROTATION_CACHE_MAX_BYTES):
+        if quality not in ("smooth", "nearest"):
+            raise ValueError(f"Unknown rotation quality: {quality}")
+        self.angle_step = angle_step
+        self.frame_count = int(round(360 / angle_step))
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.frames = OrderedDict()  # LRU order, oldest first
+        self.prewarm_cursors = {}
+        self.full = set()  # (asset key, display size) groups that reached the cap
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def frame_index(self, angle):
+        return int(round(angle / self.angle_step)) % self.frame_count
+
+    def snap(self, angle):
+        return self.frame_index(angle) * self.angle_step
+
+    def get(self, key, image, angle):
+        # Returns (frame, offset). image is already scaled to its display size,
+        # angle uses pygame's convention (degrees, counter-clockwise) and offset
+        # is the frame's top-left relative to the centre.
+        frame_key = (key, image.get_size(), self.frame_index(angle))
+        frame = self.frames.get(frame_key)
+        if frame is not None:
+            self.frames.move_to_end(frame_key)
+            self.hits += 1
+            return frame
+        self.misses += 1
+        if frame_key[:2] in self.full:
+            frame = pygame.transform.rotate(image, self.snap(angle))
+            return frame, (-(frame.get_width() // 2), -(frame.get_height() // 2))
+        frame = self._build(image, frame_key[2])
+        self._store(frame_key, frame)
+        return frame
+
+    def prewarm(self, key, image, budget=ROTATION_PREWARM_PER_FRAME):
+        # Build up to `budget` missing frames, nearest to angle 0 first in both directions
+        size = image.get_size()
+        group = (key, size)
+        cursor = self.prewarm_cursors.get(group, 0)
+        built = 0
+        while built < budget and cursor < self.frame_count:
+            index = (cursor + 1) // 2 if cursor % 2 else -(cursor // 2) % self.frame_count
+            cursor += 1
+            frame_key = (key, size, index)
+            if frame_key in self.frames:
+                continue
+            if group in self.full or not self._store(frame_key, self._build(image, index)):
+                cursor = self.frame_count  # Cap reached, stop building ahead for this asset
+                break
+            built += 1
+        self.prewarm_cursors[group] = cursor
+
+    def clear(self):
+        self.frames.clear()
+        self.prewarm_cursors.clear()
+        self.full.clear()
+        self.bytes_used = 0
+
+    def _build(self, image, index):
+        angle = index * self.angle_step
+        if self.quality == "smooth":
+            frame = pygame.transform.rotozoom(image, angle, 1.0)
+        else:
+            frame = pygame.transform.rotate(image, angle)
+        visible = frame.get_bounding_rect()
+        offset = (visible.x - frame.get_width() // 2, visible.y - frame.get_height() // 2)
+        frame = frame.subsurface(visible).copy()
+        if pygame.display.get_surface() is not None:
+            frame = frame.convert_alpha()
+        return frame, offset
+
+    def _store(self, frame_key, frame):
+        nbytes = frame[0].get_pitch() * frame[0].get_height()
+        group = frame_key[:2]
+        while self.bytes_used + nbytes > self.max_bytes:
+            # Evict the least recently used frame of another asset. If only the
+            # active asset is left, keep what we have instead of cycling through
+            # its frames and thrashing.
+            victim = next((k for k in self.frames if k[:2] != group), None)
+            if victim is None:
+                self.full.add(group)
+                return False
+            self.full.discard(victim[:2])
+            self.prewarm_cursors.pop(victim[:2], None)
+            old = self.frames.pop(victim)[0]
+            self.bytes_used -= old.get_pitch() * old.get_height()
+        self.frames[frame_key] = frame
+        self.bytes_used += nbytes
+        return True
+
+class FrameStats:
+    # Per-stage frame times in rolling windows, split by game state
+    def __init__(self, window=FRAME_STATS_WINDOW):
+        self.window = window
+        self.samples = {}  # state -> {stage: deque of seconds}
+        self.frames = {}
+        self.dropped = {}
+
+    def record(self, state, timings, budget=1 / FPS):
+        # timings holds one value per FRAME_STATS_STAGES entry; budget is the
+        # frame time the pacing aimed for
+        stages = self.samples.get(state)
+        if stages is None:
+            stages = self.samples[state] = {stage: deque(maxlen=self.window) for stage in FRAME_STATS_STAGES}
+            self.frames[state] = 0
+            self.dropped[state] = 0
+        for stage, value in zip(FRAME_STATS_STAGES, timings):
+            stages[stage].append(value)
+        self.frames[state] += 1
+        if timings[-1] > DROPPED_FRAME_FACTOR * budget:
+            self.dropped[state] += 1
+
+    def summary(self):
+        # {state: {"frames", "dropped", stage: {"p50", "p95", "p99", "max"}}} in milliseconds
+        result = {}
+        for state, stages in self.samples.items():
+            entry = {"frames": self.frames[state], "dropped": self.dropped[state]}
+            for stage, values in stages.items():
+                ordered = sorted(values)
+                if not ordered:
+                    continue
+                pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+                entry[stage] = {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1] * 1000}
+            result[state] = entry
+        return result
+
+    def export(self, basename):
+        # Writes <basename>.json and <basename>.csv, returns the JSON path
+        summary = self.summary()
+        json_path = output_path(basename + ".json")
+        with open(json_path, "w") as f:
+            json.dump(summary, f, indent=2)
+        with open(output_path(basename + ".csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["state", "stage", "frames", "dropped", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+            for state, entry in summary.items():
+                for stage in FRAME_STATS_STAGES:
+                    if stage in entry:
+                        s = entry[stage]
+                        writer.writerow([state, stage, entry["frames"], entry["dropped"],
+                                         f"{s['p50']:.3f}", f"{s['p95']:.3f}", f"{s['p99']:.3f}", f"{s['max']:.3f}"])
+        return json_path
+
+class CpuMeter:
+    # Process CPU time (all threads) against wall time, split by game state
     def __init__(self):
-        pygame.init()
-        # Get display size and set window to maximized (with title bar)
-        display_info = pygame.display.Info()
-        screen_width, screen_height = display_info.current_w, display_info.current_h
-        self.screen = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
+        self.cpu = {}
+        self.wall = {}
+
+    def record(self, state, cpu, wall):
+        self.cpu[state] = self.cpu.get(state, 0.0) + cpu
+        self.wall[state] = self.wall.get(state, 0.0) + wall
+
+    def percent(self, state):
+        wall = self.wall.get(state, 0.0)
+        return self.cpu.get(state, 0.0) / wall * 100 if wall > 0 else 0.0
+
+    def summary(self):
+        # {state: {"cpu_percent", "seconds"}}
+        return {state: {"cpu_percent": self.percent(state), "seconds": wall} for state, wall in self.wall.items()}
+
+class RecentFrames:
+    # The last RECENT_FRAMES frames' interval and work time, always kept since
+    # a frame costs one append. FrameStats is the detailed, opt-in counterpart.
+    def __init__(self, size=RECENT_FRAMES):
+        self.frames = deque(maxlen=size)  # (state, interval, work) in seconds
+
+    def record(self, state, interval, work):
+        self.frames.append((state, interval, work))
+
+    def summary(self):
+        # {state: {"frames", "interval": {"p50", "p95", "max"}, "work": {...}}} in milliseconds
+        by_state = {}
+        for state, interval, work in self.frames:
+            entry = by_state.setdefault(state, ([], []))
+            entry[0].append(interval)
+            entry[1].append(work)
+        result = {}
+        for state, series in by_state.items():
+            result[state] = {"frames": len(series[0])}
+            for name, values in zip(("interval", "work"), series):
+                values.sort()
+                result[state][name] = {"p50": values[len(values) // 2] * 1000,
+                                       "p95": values[min(len(values) - 1, int(0.95 * len(values)))] * 1000,
+                                       "max": values[-1] * 1000}
+        return result
+
+class ProfileCapture:
+    # cProfile and tracemalloc around a number of run_once() frames, split by
+    # (state, round type). Each key has its own profiler, enabled only while
+    # one of its frames runs. A tracemalloc snapshot is taken whenever the key
+    # changes, and the growth since the previous one is charged to the key
+    # that was active in between.
+    def __init__(self, frames=PROFILE_FRAMES):
+        self.frames = frames
+        self.done = 0
+        self.active = True
+        self.key = None
+        self.profiles = {}  # key -> cProfile.Profile
+        self.frame_counts = {}
+        self.allocations = {}  # key -> {"file:line": (bytes, blocks)}
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self.owns_tracing = not tracemalloc.is_tracing()
+        if self.owns_tracing:
+            tracemalloc.start(PROFILE_TRACE_DEPTH)
+        self.snapshot = self._snapshot()
+
+    def begin(self, key):
+        if key != self.key:
+            self._charge()
+            self.key = key
+        profile = self.profiles.get(key)
+        if profile is None:
+            profile = self.profiles[key] = cProfile.Profile()
+        profile.enable()
+
+    def end(self):
+        # Returns True when the last frame has been captured
+        self.profiles[self.key].disable()
+        self.frame_counts[self.key] = self.frame_counts.get(self.key, 0) + 1
+        self.done += 1
+        return self.done >= self.frames
+
+    def finish(self):
+        self._charge()
+        self.active = False
+        self.seconds = time.perf_counter() - self.started
+        if self.owns_tracing:
+            tracemalloc.stop()
+
+    def top_functions(self, limit=PROFILE_TOP):
+        # [(label, own seconds, calls)] over all keys, most own time first
+        if not self.profiles:
+            return []
+        stats = pstats.Stats(*self.profiles.values())
+        rows = []
+        for (filename, line, name), (_, calls, own, _, _) in stats.stats.items():
+            label = name if filename == "~" else f"{name} ({os.path.basename(filename)}:{line})"
+            rows.append((label, own, calls))
+        return sorted(rows, key=lambda row: row[1], reverse=True)[:limit]
+
+    def top_allocations(self, limit=PROFILE_TOP):
+        # [(site, bytes, blocks)] over all keys, largest growth first
+        totals = {}
+        for sites in self.allocations.values():
+            for site, (size, count) in sites.items():
+                size0, count0 = totals.get(site, (0, 0))
+                totals[site] = (size0 + size, count0 + count)
+        return sorted(((site, size, count) for site, (size, count) in totals.items()),
+                      key=lambda row: row[1], reverse=True)[:limit]
+
+    def export(self, directory):
+        # A pstats file per key, allocations.txt and summary.json; returns the directory
+        os.makedirs(directory, exist_ok=True)
+        summary = {"frames": self.done, "seconds": self.seconds, "keys": []}
+        for key, profile in self.profiles.items():
+            name = re.sub(r"[^A-Za-z0-9]+", "_", "__".join(key)).strip("_")
+            profile.dump_stats(os.path.join(directory, name + ".prof"))
+            summary["keys"].append({"state": key[0], "round": key[1], "frames": self.frame_counts.get(key, 0),
+                                    "profile": name + ".prof"})
+        summary["top_functions"] = [{"function": label, "seconds": own, "calls": calls}
+                                    for label, own, calls in self.top_functions()]
+        summary["top_allocations"] = [{"site": site, "bytes": size, "blocks": count}
+                                      for site, size, count in self.top_allocations()]
+        with open(os.path.join(directory, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        with open(os.path.join(directory, "allocations.txt"), "w") as f:
+            for key, sites in self.allocations.items():
+                f.write(f"{key[0]} / {key[1]}\n")
+                for site, (size, count) in sorted(sites.items(), key=lambda item: item[1][0], reverse=True):
+                    f.write(f"  {size / 1024:10.1f} KiB {count:8d} blocks  {site}\n")
+        return directory
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+
+    def _charge(self):
+        if self.key is None:
+            return
+        snapshot = self._snapshot()
+        sites = self.allocations.setdefault(self.key, {})
+        for stat in snapshot.compare_to(self.snapshot, "lineno"):
+            if stat.size_diff or stat.count_diff:
+                frame = stat.traceback[0]
+                site = f"{frame.filename}:{frame.lineno}"
+                size, count = sites.get(site, (0, 0))
+                sites[site] = (size + stat.size_diff, count + stat.count_diff)
+        self.snapshot = snapshot
+
+class AudioScheduler:
+    # Plays audio cues at times relative to the start of the current phase.
+    # begin_phase() replaces the pending cues; update() is called every
+    # simulation step and returns the keys of cues that became due. A cue
+    # within the lookahead is played on its channel after a silence pad of the
+    # remaining wall-clock time and the real cue is queued behind it, so the
+    # mixer starts it sample-accurately. With the real clock, each cue's start
+    # latency is measured by watching its channel switch from the silence pad
+    # to the cue on every update(): the start is taken as the midpoint between
+    # the last check that still saw it queued and the first that saw it
+    # playing, so it is good to half a frame. This is when the mixer starts
+    # mixing the cue; the device's output buffer adds a fixed delay after it.
+    def __init__(self, sound_lookup, wall_clock=time.perf_counter, lookahead=AUDIO_LOOKAHEAD_SECONDS):
+        self.sound_lookup = sound_lookup
+        self.wall_clock = wall_clock
+        self.lookahead = lookahead
+        self.channels = {}
+        self.mixer = pygame.mixer.get_init()  # (frequency, format, channels) or None without audio
+        if self.mixer:
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), len(AUDIO_CUE_CHANNELS)))
+            pygame.mixer.set_reserved(len(AUDIO_CUE_CHANNELS))
+            self.channels = {cue: pygame.mixer.Channel(i) for cue, i in AUDIO_CUE_CHANNELS.items()}
+        self.phase = None
+        self.phase_start = 0.0  # Simulation time
+        self.phase_wall = 0.0  # Wall-clock time when the phase started
+        self.pending = []  # [offset, cue, audio_key, queued] sorted by offset
+        # Start latency needs the real clock (headless runs simulate it)
+        self.measuring = bool(self.mixer) and wall_clock is time.perf_counter
+        self.watching = []  # [cue, channel, sound, intended wall time, last check] of cues not started yet
+        self.latency = {}  # cue -> [seconds from intended to actual start], one per cue heard
+
+    def begin_phase(self, phase, now, cues=()):
+        # cues is a list of (phase time in seconds, cue type, audio key)
+        for offset, cue, _, queued in self.pending:
+            if queued and cue in self.channels:
+                self.channels[cue].stop()
+        self.phase = phase
+        self.phase_start = now
+        self.phase_wall = self.wall_clock()
+        self.pending = sorted([offset, cue, key, False] for offset, cue, key in cues)
+        return self.update(now)
+
+    def play_now(self, cue, audio_key):
+        # Unscheduled cue (e.g. a replay); restarts the cue's channel
+        sound = self.sound_lookup(audio_key)
+        channel = self.channels.get(cue)
+        if sound and channel:
+            channel.play(sound)
+        return bool(sound)
+
+    def update(self, now):
+        # Returns [(audio key, found)] for cues due at simulation time `now`
+        if self.watching:
+            self._observe()
+        due = []
+        for entry in self.pending:
+            offset, cue, audio_key, queued = entry
+            lead = self.phase_start + offset - now
+            if lead > self.lookahead:
+                break
+            if not queued:
+                self._start(cue, audio_key, self.phase_wall + offset)
+                entry[3] = True
+            if lead <= 1e-9:
+                due.append((audio_key, bool(self.sound_lookup(audio_key))))
+        self.pending = [entry for entry in self.pending if self.phase_start + entry[0] - now > 1e-9]
+        return due
+
+    def summary(self):
+        # {cue: {"count", "mean_ms", "max_ms"}} of the measured start latency
+        return {cue: {"count": len(values), "mean_ms": sum(values) / len(values) * 1000, "max_ms": max(values) * 1000}
+                for cue, values in self.latency.items() if values}
+
+    def _start(self, cue, audio_key, intended_wall):
+        sound = self.sound_lookup(audio_key)
+        channel = self.channels.get(cue)
+        if not sound or not channel:
+            return
+        now = self.wall_clock()
+        lead = max(intended_wall - now, 0.0)
+        pad = self._silence(lead)
+        if pad is None:
+            channel.play(sound)
+        else:
+            channel.play(pad)
+            channel.queue(sound)
+        if self.measuring:
+            self.watching.append([cue, channel, sound, intended_wall, now])
+            self._observe()
+
+    def _observe(self):
+        # Record the cues whose channel has moved on from the pad to them
+        now = time.perf_counter()
+        watching = []
+        for entry in self.watching:
+            cue, channel, sound, intended_wall, last_check = entry
+            if channel.get_sound() is sound:
+                self.latency.setdefault(cue, []).append((last_check + now) / 2 - intended_wall)
+            elif channel.get_queue() is sound:
+                entry[4] = now
+                watching.append(entry)
+            # Otherwise the cue was stopped or replaced before it started
+        self.watching = watching
+
+    def _silence(self, seconds):
+        frequency, fmt, channels = self.mixer
+        samples = int(round(seconds * frequency))
+        if samples <= 0:
+            return None
+        return pygame.mixer.Sound(buffer=bytes(samples * channels * (abs(fmt) // 8)))
+
+class EventLog:
+    # Appends app events to a JSON lines file from a background thread.
+    # write() only puts the event on a SimpleQueue, so the frame loop never
+    # waits on the disk; the writer drains the queue in batches and fsyncs at
+    # most every EVENT_LOG_FSYNC_SECONDS. Each line gets the wall-clock time.
+    # Without threads (browser builds) write() appends the line itself and the
+    # file is flushed at most every EVENT_LOG_FSYNC_SECONDS.
+    def __init__(self, path, fsync_interval=EVENT_LOG_FSYNC_SECONDS, threaded=THREADS_ENABLED):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.queue = queue.SimpleQueue()
+        self.file = open(path, "a", encoding="utf-8")
+        self.thread = None
+        self.last_sync = time.monotonic()
+        if threaded:
+            self.thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+            self.thread.start()
+
+    def write(self, event):
+        if self.thread is not None:
+            self.queue.put((time.time(), event))
+            return
+        self.file.write(self.line(time.time(), event))
+        if time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.file.flush()
+            self.last_sync = time.monotonic()
+
+    def close(self):
+        # Flushes everything written so far
+        if self.thread is None:
+            self.file.close()
+            return
+        self.queue.put(None)
+        self.thread.join()
+
+    def line(self, wall, event):
+        return json.dumps(dict(event, wall=round(wall, 3))) + "\n"
+
+    def _run(self):
+        last_sync = time.monotonic()
+        unsynced = False
+        closing = False
+        while not closing:
+            try:
+                batch = [self.queue.get(timeout=self.fsync_interval)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < EVENT_LOG_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            for item in batch:
+                if item is None:
+                    closing = True
+                    break
+                lines.append(self.line(*item))
+            if lines:
+                self.file.write("".join(lines))
+                unsynced = True
+            if unsynced and (closing or time.monotonic() - last_sync >= self.fsync_interval):
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                last_sync = time.monotonic()
+                unsynced = False
+        self.file.close()
+
+class LayeredRenderer:
+    # Composes a cached static layer (background, titles, still images) with a
+    # few dynamic sprites on top. The static layer is rebuilt only when the
+    # scene key changes; otherwise only regions whose sprites changed are
+    # restored from it, redrawn and reported as dirty.
+    rotates = False  # Sprites arrive pre-rotated (RotationCache)
+
+    def __init__(self, logical_size=None):
+        self.logical_size = logical_size
+        self.screen = None
+        self.static = None
+        self.scene = None
+        self.sprites = {}  # key -> (surface, rect) drawn last frame
+
+    def invalidate(self):
+        self.scene = None
+
+    def resize(self, window_size):
+        # Returns the surface frames are composed on
+        self.invalidate()
+        if self.logical_size is None:
+            self.screen = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+        else:
+            # pygame.SCALED keeps the canvas at the logical size; SDL scales it
+            # to the window, letterboxed, and maps mouse positions back to it
+            if self.screen is None:
+                self.screen = pygame.display.set_mode(self.logical_size, pygame.SCALED | pygame.RESIZABLE)
+            from pygame._sdl2 import video
+            window = video.Window.from_display_module()
+            if tuple(window.size) != tuple(window_size):
+                window.size = window_size
+        return self.screen
+
+    def mouse_pos(self):
+        return pygame.mouse.get_pos()
+
+    def frame(self, screen):
+        # The surface last presented, for recording
+        return screen
+
+    def show(self, screen):
+        # Presents a screen drawn outside draw(), e.g. the loading splash
+        pygame.display.flip()
+
+    def present(self, dirty):
+        if dirty is None:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+
+    def draw(self, screen, scene, draw_static, sprites):
+        # sprites is a list of (key, surface, rect) in drawing order. Returns
+        # the dirty rects, or None when the whole screen was redrawn.
+        current = {key: (surf, rect) for key, surf, rect in sprites}
+        if scene != self.scene or self.static is None or self.static.get_size() != screen.get_size():
+            if self.static is None or self.static.get_size() != screen.get_size():
+                self.static = pygame.Surface(screen.get_size()).convert()
+            draw_static(self.static)
+            self.scene = scene
+            screen.blit(self.static, (0, 0))
+            for key, surf, rect in sprites:
+                screen.blit(surf, rect)
+            self.sprites = current
+            return None
+        dirty = []
+        redraw = set()
+        for key, (surf, rect) in self.sprites.items():
+            now = current.get(key)
+            if now is None or now[0] is not surf or now[1] != rect:
+                dirty.append(rect)
+        for key, (surf, rect) in current.items():
+            before = self.sprites.get(key)
+            if before is None or before[0] is not surf or before[1] != rect:
+                dirty.append(rect)
+                redraw.add(key)
+        # Unchanged sprites overlapping a dirty region are restored and redrawn
+        # whole, so alpha edges are never blended twice
+        grew = bool(dirty)
+        while grew:
+            grew = False
+            for key, (surf, rect) in current.items():
+                if key not in redraw and rect.collidelist(dirty) != -1:
+                    redraw.add(key)
+                    dirty.append(rect)
+                    grew = True
+        for rect in dirty:
+            screen.blit(self.static, rect, rect)
+        for key, surf, rect in sprites:
+            if key in redraw:
+                screen.blit(surf, rect)
+        self.sprites = current
+        return dirty
+
+class TextureRenderer:
+    # Same interface as LayeredRenderer on an SDL2 Renderer. The static layer
+    # is uploaded as one texture per scene and sprite surfaces once each
+    # (cached by identity, the caches above keep them stable); the rotating
+    # arrow is drawn with Texture.draw(angle=...), so no rotated frames are
+    # built. Every frame that changes is redrawn whole, which an accelerated
+    # renderer does in a fraction of the surface path's time.
+    rotates = True  # Sprites may carry an angle as a fourth item
+
+    def __init__(self, window_size, logical_size=None, title=WINDOW_TITLE, max_entries=TEXTURE_CACHE_MAX_ENTRIES):
+        from pygame._sdl2 import video
+        self.video = video
+        # Filtered rotation and scaling, matching ROTATION_QUALITY
+        os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "linear" if ROTATION_QUALITY == "smooth" else "nearest")
+        # Surface.convert() needs a display mode; its window stays hidden
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+        self.window = video.Window(title, window_size, resizable=True)
+        self.renderer = video.Renderer(self.window)
+        self.logical_size = logical_size
+        if logical_size is not None:
+            # The renderer scales and letterboxes, and maps mouse events back
+            self.renderer.logical_size = logical_size
+        self.max_entries = max_entries
+        self.textures = OrderedDict()  # id(surface) -> (surface, texture)
+        self.static = None
+        self.static_texture = None
+        self.scene = None
+        self.drawn = None  # Sprite list drawn last frame
+
+    def invalidate(self):
+        self.scene = None
+
+    def resize(self, window_size):
+        if tuple(self.window.size) != tuple(window_size):
+            self.window.size = window_size
+        self.invalidate()
+        return pygame.Surface(self.logical_size or window_size)
+
+    def mouse_pos(self):
+        # Mouse events are mapped to the logical size by SDL, the polled position is not
+        x, y = pygame.mouse.get_pos()
+        if self.logical_size is None:
+            return x, y
+        (w, h), (lw, lh) = self.window.size, self.logical_size
+        scale = min(w / lw, h / lh)
+        return int((x - (w - lw * scale) / 2) / scale), int((y - (h - lh * scale) / 2) / scale)
+
+    def texture(self, surf):
+        entry = self.textures.get(id(surf))
+        if entry is not None and entry[0] is surf:
+            self.textures.move_to_end(id(surf))
+            return entry[1]
+        texture = self.video.Texture.from_surface(self.renderer, surf)
+        # The surface is kept with its texture so its id is not reused
+        self.textures[id(surf)] = (surf, texture)
+        if len(self.textures) > self.max_entries:
+            self.textures.popitem(last=False)
+        return texture
+
+    def frame(self, screen):
+        # Read back from the renderer; this allocates, unlike the surface path
+        return self.renderer.to_surface()
+
+    def show(self, screen):
+        self.invalidate()
+        self.renderer.clear()
+        self.video.Texture.from_surface(self.renderer, screen).draw()
+        self.renderer.present()
+
+    def draw(self, screen, scene, draw_static, sprites):
+        # sprites is a list of (key, surface, rect) or (key, surface, rect,
+        # angle in degrees clockwise). Returns None when the frame was redrawn
+        # and [] when nothing changed.
+        frame = [(s[0], s[1], pygame.Rect(s[2]), s[3] if len(s) > 3 else 0) for s in sprites]
+        if scene != self.scene or self.static is None or self.static.get_size() != screen.get_size():
+            if self.static is None or self.static.get_size() != screen.get_size():
+                self.static = pygame.Surface(screen.get_size()).convert()
+            draw_static(self.static)
+            self.static_texture = self.video.Texture.from_surface(self.renderer, self.static)
+            self.scene = scene
+        elif frame == self.drawn:
+            return []
+        self.renderer.clear()
+        self.static_texture.draw()
+        for key, surf, rect, angle in frame:
+            self.texture(surf).draw(dstrect=rect, angle=angle)
+        self.drawn = frame
+        return None
+
+    def present(self, dirty):
+        if dirty is None:
+            self.renderer.present()
+
+class EgelyApp:
+    # clock and rng can be injected for deterministic runs (see headless.py);
+    # window_size overrides the maximized window; sensor is an optional
+    # sensor.SensorReader for the physical wheel and history an optional
+    # history.SessionHistory that completed sessions are saved to; renderer
+    # overrides RENDER_BACKEND and logical_size LOGICAL_SIZE. With shared set
+    # to another EgelyApp this is a further participant of a group session: it
+    # opens no window and loads nothing, drawing into the viewport GroupApp
+    # gives it with the other app's SHARED_RESOURCES.
+    def __init__(self, clock=None, rng=None, window_size=None, sensor=None, history=None, renderer=None,
+                 logical_size=LOGICAL_SIZE, shared=None):
+        if shared is None:
+            self.bundle = open_bundle(resource_path(BUNDLE_NAME)) if ASSET_BUNDLE_ENABLED else None
+            if self.bundle is not None:
+                # Run the mixer in the format the bundle's audio was decoded to
+                frequency, size, channels = self.bundle.mixer
+                pygame.mixer.pre_init(frequency, size, channels, allowedchanges=0)
+            pygame.init()
+            if window_size is None:
+                # Get display size and set window to maximized (with title bar)
+                display_info = pygame.display.Info()
+                window_size = (display_info.current_w, display_info.current_h)
+            self.layers = self.create_renderer(renderer or RENDER_BACKEND, window_size, logical_size)
+            self.screen = self.layers.resize(window_size)
+            pygame.display.set_caption(WINDOW_TITLE)
+        else:
+            self.layers = LayeredRenderer()
+            self.screen = shared.screen
         self.window_size = self.screen.get_size()
-        pygame.display.set_caption("Egely Wheel - Spin Control")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("Arial", 36)
-        self.small_font = pygame.font.SysFont("Arial", 24)
+        self.viewport = pygame.Rect((0, 0), self.window_size)  # Where self.screen is in the window
+        self.clock = clock or pygame.time.Clock()
+        self.rng = rng or random.Random()
+        self.listeners = []  # Callables receiving a dict for every app event
+        if shared is None:
+            self.fonts = FontRegistry()
+            self.font = self.fonts.get(36)
+            self.small_font = self.fonts.get(24)
+            # Every size the pulsing timer can use
+            self.fonts.preload(range(int(36 * TIMER_PULSE_MIN), int(36 * TIMER_PULSE_MAX) + 1))
+            self.text_cache = TextCache()
+            self.button_surfaces = {}  # (text, hover, size) -> pre-drawn button
         self.state = STATE_STARTUP
         self.round = 1
+        self.plans = []  # RoundPlan per round of the current game
+        self.plan = None  # Plan of the round being played
         self.instructions = []
         self.current_instruction = ""
-        self.current_image = None
         self.timer = 0
         self.audio = {}
-        self.images = []
         self.wheel_bg_img = None  # Static background wheel
         self.arrow_cw_img = None  # Rotating clockwise arrow
         self.arrow_ccw_img = None  # Rotating counterclockwise arrow
         self.blue_arrows_img = None  # Light blue arrows for special round
-        self.load_assets()
+        if shared is None:
+            self.assets = AssetCache(self.window_size, self.bundle)
+            self.rotation_cache = RotationCache()
+            sound_lookup = self.sound
+        else:
+            # Only the first participant of a group is heard
+            sound_lookup = lambda audio_key: None
+        self.audio_scheduler = AudioScheduler(sound_lookup, getattr(self.clock, "now", time.perf_counter))
+        self.sensor = sensor
+        self.attempt_start_wall = None  # perf_counter() at the start of the attempt, the sensor's time base
+        self.round_samples = {}  # round -> (times, angles) the sensor recorded during its attempt
+        self.live_score = None  # scoring.IncrementalScore of the running attempt
+        self.sensor_cursor = 0  # Next sensor sample index to score
+        self.results = None  # [(instruction, passed, text)] per round, shown on the end screen
+        self.round_metrics = {}  # round -> scoring.analyze() result
+        self.history = history
+        self.participant = PARTICIPANT
+        self.group_index = None  # 1-based viewport of a group session
+        self.eliminated_round = None
+        self.session_started = None  # time.time() when round 1 started
+        self.round_started = {}  # round -> time.time() when its attempt started
+        self.history_before = [None]  # Page start ids, one per page visited; the last is shown
+        self.history_page = []
+        self.history_stats = None
+        self.history_round_stats = []
+        self.running = True
+        self.startup_metrics = {}  # Seconds from process start to the first frame and to interactive
+        if shared is None:
+            self.load_assets()
+        else:
+            for name in SHARED_RESOURCES:
+                setattr(self, name, getattr(shared, name))
         # Move Start button lower and label it 'Start'
         self.button_rect = pygame.Rect(0, 0, 220, 60)
         self.button_rect.center = (self.window_size[0] // 2, int(self.window_size[1] * 0.85))
         self.close_button_rect = pygame.Rect(0, 0, 220, 60)
         self.close_button_rect.center = (self.window_size[0] // 2, (self.window_size[1] // 2) + 180)
-        self.running = True
+        self.history_button_rect = pygame.Rect(0, 0, 220, 60)
         self.button_scale = 1.0
         self.close_button_scale = 1.0
-        self.button_anim_speed = 0.08
+        self.button_anim_speed = 4.8  # Fraction of the remaining scale change per second
         self.timer_pulse = 1.0
         self.timer_pulse_dir = 1
-        self.timer_pulse_speed = 0.01
+        self.timer_pulse_speed = 0.6  # Scale change per second
         # Add rotation state
         self.rotation_angle = 0
+        self.prev_rotation_angle = 0  # Angle before the last simulation step, for interpolation
+        self.rotation_speed = 60  # deg/sec
         self.rotation_direction = 1
         # Add direction switch timer
         self.direction_switch_timer = 0
-        self.ten_sec_audio_played = False
         self.attempt_end_wait_start = None  # Track when wait after attempt ends
         self.rotation_progress = 0  # Track degrees rotated in current direction
         self.end_audio_played = False
+        # Fixed-step simulation clock
+        self.sim_time = 0.0
+        self.sim_accumulator = 0.0
+        self.render_alpha = 0.0  # Fraction of a step between the last update and this frame
+        # Frame-time instrumentation, None while disabled
+        self.frame_stats = FrameStats() if FRAME_STATS_ENABLED else None
+        self.show_frame_stats = False
+        self.frame_stats_overlay = None
+        self.frame_stats_overlay_time = 0.0
+        self.frame_stats_overlay_state = None
+        self.cpu_meter = CpuMeter()
+        self.recent_frames = RecentFrames()
+        # main() sleeps between frames in asyncio instead of wait_for_frame()
+        # blocking, so the control socket is served while the app idles;
+        # settled screens still block on input, for IDLE_POLL_SECONDS at most
+        self.paced_by_caller = False
+        self.frame_started = time.perf_counter()  # When the last frame's wait ended
+        self.cpu_mark = None  # (process time, wall time) when the last frame began
+        # Session recording
+        self.record_sessions = CAPTURE_ENABLED
+        self.recorder = None  # capture.FrameRecorder of the session being recorded
+        self.recording_started = 0.0  # sim_time when the recording started
+        self.record_button_rect = pygame.Rect(0, 0, 180, 44)
+        # Profiler capture (F9 or EGELY_PROFILE)
+        self.profiler = None  # ProfileCapture, kept after it finishes for the overlay
+        self.profile_overlay = None
+        frames, _, state = PROFILE_TRIGGER.partition("@")
+        self.profile_trigger = (int(frames), state or None) if frames else None  # (frames, state or None)
+
+    def create_renderer(self, backend, window_size, logical_size=None):
+        # The surface path is the fallback when the texture one is unavailable
+        if backend == "texture":
+            try:
+                return TextureRenderer(window_size, logical_size)
+            except (ImportError, pygame.error) as e:
+                log.warning("Texture renderer unavailable, using surfaces: %s", e)
+        elif backend != "surface":
+            log.warning("Unknown render backend %r, using surfaces", backend)
+        return LayeredRenderer(logical_size)
 
     def load_assets(self):
-        # Load images
-        for img_file in INSTRUCTION_IMAGES:
-            img_path = resource_path(img_file)
-            if os.path.exists(img_path):
-                print(f"Loaded image: {img_file}")
-                img = pygame.image.load(img_path)
-                img = pygame.transform.smoothscale(img, INSTRUCTION_IMAGE_SIZE)
-                self.images.append(img)
-            else:
-                print(f"Missing image: {img_file}")
-                self.images.append(None)
-
-        # Load special images for clockwise round
-        wheel_bg_path = resource_path("black_egely_wheel_only.png")
-        if os.path.exists(wheel_bg_path):
-            print("Loaded special image: black_egely_wheel_only.png")
-            self.wheel_bg_img = pygame.image.load(wheel_bg_path)
-            self.wheel_bg_img = pygame.transform.smoothscale(self.wheel_bg_img, WHEEL_SIZE["instruction"])
-        else:
-            print("Missing special image: black_egely_wheel_only.png")
-
-        # Load clockwise arrow
-        arrow_cw_path = resource_path("green_arrow_clockwise.png")
-        if os.path.exists(arrow_cw_path):
-            print("Loaded special image: green_arrow_clockwise.png")
-            self.arrow_cw_img = pygame.image.load(arrow_cw_path)
-            self.arrow_cw_img = pygame.transform.smoothscale(self.arrow_cw_img, GREEN_ARROW_SIZE["instruction"])
-        else:
-            print("Missing special image: green_arrow_clockwise.png")
-
-        # Load counterclockwise arrow
-        arrow_ccw_path = resource_path("green_arrow_anticlockwise.png")
-        if os.path.exists(arrow_ccw_path):
-            print("Loaded special image: green_arrow_anticlockwise.png")
-            self.arrow_ccw_img = pygame.image.load(arrow_ccw_path)
-            self.arrow_ccw_img = pygame.transform.smoothscale(self.arrow_ccw_img, GREEN_ARROW_SIZE["instruction"])
-        else:
-            print("Missing special image: green_arrow_anticlockwise.png")
-
-        # Load blue arrows for special rounds
-        blue_arrows_path = resource_path("light_blue_arrows_transparent.png")
-        if os.path.exists(blue_arrows_path):
-            print("Loaded special image: light_blue_arrows_transparent.png")
-            self.blue_arrows_img = pygame.image.load(blue_arrows_path)
-            self.blue_arrows_img = pygame.transform.smoothscale(self.blue_arrows_img, BLUE_ARROWS_SIZE["instruction"])
-        else:
-            print("Missing special image: light_blue_arrows_transparent.png")
+        # Decode everything on the loader threads (or between splash frames
+        # where there are none) while a splash is shown.
+        # Images are needed by the start screen and are waited for; audio keeps
+        # loading in the background and the current round's audio goes first.
+        self.loader = AssetLoader(bundle=self.bundle)
+        image_files = list(SPECIAL_IMAGES) + [f for f in INSTRUCTION_IMAGES if f not in SPECIAL_IMAGES]
+        for img_file in image_files:
+            self.loader.request(img_file, "image", 0)
+        # Audio is keyed by instruction name for the instructions and by file name otherwise
+        self.audio_files = dict(zip(INSTRUCTIONS, INSTRUCTION_AUDIO))
+        for audio_file in ADDITIONAL_AUDIO:
+            self.audio_files[audio_file] = audio_file
+        for audio_file in self.audio_files.values():
+            self.loader.request(audio_file, "sound", 1)
+        while self.running and not self.loader.ready(image_files):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    self.running = False
+            self.collect_assets()
+            self.render_splash()
+            self.clock.tick(FPS)
+        self.collect_assets()
 
-        # Load audio files for instructions
-        for idx, audio_file in enumerate(INSTRUCTION_AUDIO):
-            audio_path = resource_path(audio_file)
-            if os.path.exists(audio_path):
-                self.audio[INSTRUCTIONS[idx]] = pygame.mixer.Sound(audio_path)
+    def collect_assets(self):
+        # Take over whatever the loader threads finished since the last call
+        for name in self.loader.poll():
+            result = self.loader.results[name]
+            if self.loader.kinds[name] == "image":
+                if result is None:
+                    log.warning("Missing image: %s", name)
+                    continue
+                log.debug("Loaded image: %s", name)
+                self.assets.add(name, result)
+                if name in SPECIAL_IMAGES:
+                    setattr(self, SPECIAL_IMAGES[name], result)
             else:
-                self.audio[INSTRUCTIONS[idx]] = None
+                if result is None:
+                    log.warning("Missing audio: %s", name)
+                for key, audio_file in self.audio_files.items():
+                    if audio_file == name:
+                        self.audio[key] = result
 
-        # Load additional audio files
-        for audio_file in ADDITIONAL_AUDIO:
-            audio_path = resource_path(audio_file)
-            if os.path.exists(audio_path):
-                self.audio[audio_file] = pygame.mixer.Sound(audio_path)
-            else:
-                self.audio[audio_file] = None
-                print(f"Missing audio: {audio_file}")
+    def sound(self, audio_key):
+        # Decoded sound, waiting for the loader if it has not got to it yet
+        if audio_key not in self.audio and audio_key in self.audio_files:
+            self.audio[audio_key] = self.loader.wait(self.audio_files[audio_key])
+        return self.audio.get(audio_key)
+
+    def render_splash(self):
+        done, total = self.loader.progress()
+        w, h = self.window_size
+        self.screen.fill(BG_COLOR)
+        self.draw_text_center("Loading...", 0.45, self.small_font)
+        bar = pygame.Rect(0, 0, w // 3, 12)
+        bar.center = (w // 2, int(h * 0.52))
+        pygame.draw.rect(self.screen, (220, 220, 220), bar, border_radius=6)
+        filled = bar.copy()
+        filled.width = int(bar.width * done / max(total, 1))
+        pygame.draw.rect(self.screen, TIMER_COLOR, filled, border_radius=6)
+        self.layers.show(self.screen)
+        self.record_startup_metric("time_to_first_frame")
+
+    def record_startup_metric(self, name):
+        if name not in self.startup_metrics:
+            self.startup_metrics[name] = time.perf_counter() - PROCESS_START
+            log.info("%s: %.0f ms", name.replace('_', ' ').capitalize(), self.startup_metrics[name] * 1000)
 
     def reset_game(self):
         self.round = 1
-        # Create lists of all possible rounds
-        all_instructions = list(INSTRUCTIONS)
-        all_images = list(INSTRUCTION_IMAGES)
-        all_audio = list(INSTRUCTION_AUDIO)
+        specs = list(ROUND_SPECS)
         
         # Randomly select which round to eliminate (0 to 4)
-        eliminated_index = random.randint(0, len(all_instructions) - 1)
-        eliminated_round = all_instructions[eliminated_index]
-        
-        # Remove the eliminated round from all lists
-        all_instructions.pop(eliminated_index)
-        all_images.pop(eliminated_index)
-        all_audio.pop(eliminated_index)
-        
-        print(f"Eliminated round: {eliminated_round}")  # Debug print to see which round was eliminated
-        
-        # Load the remaining images
-        self.images = []
-        for img_file in all_images:
-            img_path = resource_path(img_file)
-            if os.path.exists(img_path):
-                img = pygame.image.load(img_path)
-                img = pygame.transform.smoothscale(img, (400, 400))
-                self.images.append(img)
-            else:
-                self.images.append(None)
+        eliminated_index = self.rng.randint(0, len(specs) - 1)
+        eliminated_round = specs.pop(eliminated_index)["instruction"]
+        self.eliminated_round = eliminated_round
+        log.debug("Eliminated round: %s", eliminated_round)
         
         # Shuffle the remaining 4 rounds
-        zipped = list(zip(all_instructions, self.images, all_audio))
-        random.shuffle(zipped)
-        self.instructions, self.images, _ = zip(*zipped)
-        self.instructions = list(self.instructions)
-        self.images = list(self.images)
+        self.rng.shuffle(specs)
+        self.compile_rounds(specs)
         
-        self.state = STATE_STARTUP
         # Select unique motivational prompts for each round
-        self.round_prompts = random.sample(MOTIVATIONAL_PROMPTS, ROUND_TOTAL)
+        self.round_prompts = self.rng.sample(MOTIVATIONAL_PROMPTS, ROUND_TOTAL)
         self.end_audio_played = False
+        self.round_samples = {}
+        self.results = None
+        self.round_metrics = {}
+        self.session_started = None
+        self.round_started = {}
+        self.stop_recording()
+        self.emit("game", eliminated=eliminated_round, rounds=list(self.instructions), prompts=list(self.round_prompts))
+        self.set_state(STATE_STARTUP)
+
+    def compile_rounds(self, specs):
+        # Build the per-round plans the frame loop runs from
+        self.plans = [RoundPlan(spec) for spec in specs]
+        self.plan = self.plans[0]
+        self.instructions = [plan.instruction for plan in self.plans]
+        # Decode the first round's instruction audio before the rest
+        self.loader.prioritize([self.plan.audio_file])
 
-    def draw_text_center(self, text, y_ratio, font=None, color=TEXT_COLOR):
+    def text_sprite(self, text, y_ratio, font=None, color=TEXT_COLOR):
         if font is None:
             font = self.font
-        surf = font.render(text, True, color)
+        surf = self.text_cache.render(text, font, color)
         # y_ratio is a float between 0 and 1 (fraction of window height)
         y = int(self.window_size[1] * y_ratio)
-        rect = surf.get_rect(center=(self.window_size[0] // 2, y))
-        self.screen.blit(surf, rect)
+        return surf, surf.get_rect(center=(self.window_size[0] // 2, y))
+
+    def draw_text_center(self, text, y_ratio, font=None, color=TEXT_COLOR, surface=None):
+        surf, rect = self.text_sprite(text, y_ratio, font, color)
+        (surface or self.screen).blit(surf, rect)
 
-    def draw_button(self, text, hover=False, rect=None, scale=1.0):
+    def button_sprite(self, text, hover=False, rect=None, scale=1.0):
         if rect is None:
             rect = self.button_rect
-        color = BUTTON_HOVER_COLOR if hover else BUTTON_COLOR
-        # Animate scale
-        scaled_rect = rect.copy()
-        center = rect.center
-        scaled_rect.width = int(rect.width * scale)
-        scaled_rect.height = int(rect.height * scale)
-        scaled_rect.center = center
-        pygame.draw.rect(self.screen, color, scaled_rect, border_radius=12)
-        # Center text in button
-        surf = self.small_font.render(text, True, BUTTON_TEXT_COLOR)
-        text_rect = surf.get_rect(center=scaled_rect.center)
-        self.screen.blit(surf, text_rect)
-
-    def play_audio(self, audio_key):
-        sound = self.audio.get(audio_key)
-        if sound:
-            sound.stop()
-            sound.play()
+        # Animate scale; each (text, hover, size) is drawn once and reused
+        size = (int(rect.width * scale), int(rect.height * scale))
+        key = (text, hover, size)
+        surf = self.button_surfaces.get(key)
+        if surf is None:
+            color = BUTTON_HOVER_COLOR if hover else BUTTON_COLOR
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.rect(surf, color, surf.get_rect(), border_radius=12)
+            # Center text in button
+            label = self.text_cache.render(text, self.small_font, BUTTON_TEXT_COLOR)
+            surf.blit(label, label.get_rect(center=surf.get_rect().center))
+            self.button_surfaces[key] = surf
+        return surf, surf.get_rect(center=rect.center)
+
+    def emit(self, event, **fields):
+        # Notify listeners (session logs, test harnesses) of an app event
+        if self.listeners:
+            fields["event"] = event
+            fields["t"] = round(self.sim_time, 4)
+            for listener in self.listeners:
+                listener(fields)
+
+    def set_state(self, state):
+        previous = self.state
+        self.state = state
+        self.emit("state", state=state, round=self.round)
+        if state == STATE_END and previous != STATE_HISTORY:
+            self.export_frame_stats()
+            self.report_audio_latency()
+            self.report_cpu_usage()
+
+    def output_name(self, prefix):
+        # Timestamped name for this session's output files; the participant
+        # (and viewport, in a group) keeps sessions started together apart
+        tag = re.sub(r"[^\w-]+", "_", self.participant)
+        if self.group_index is not None:
+            tag = f"{self.group_index}_{tag}"
+        return f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{tag}"
+
+    def export_frame_stats(self):
+        if self.frame_stats is not None and self.frame_stats.frames:
+            path = self.frame_stats.export(os.path.join("frame_stats", self.output_name("frame_stats")))
+            log.info("Frame stats written to %s", path)
+
+    def report_audio_latency(self):
+        for cue, s in self.audio_scheduler.summary().items():
+            log.info("Audio cue '%s': %d started, %.1f ms after the intended time on average, max %.1f ms",
+                     cue, s["count"], s["mean_ms"], s["max_ms"])
+
+    def report_cpu_usage(self):
+        for state, s in self.cpu_meter.summary().items():
+            log.info("CPU in %s: %.1f%% over %.0f s", state, s["cpu_percent"], s["seconds"])
+
+    def play_audio(self, audio_key, cue):
+        found = self.audio_scheduler.play_now(cue, audio_key)
+        self.emit("audio", key=audio_key, found=found)
+
+    def schedule_audio(self, phase, cues):
+        # cues is a list of (seconds into the phase, cue type, audio key)
+        for audio_key, found in self.audio_scheduler.begin_phase(phase, self.sim_time, cues):
+            self.emit("audio", key=audio_key, found=found)
 
     def handle_events(self):
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+            self.handle_event(event)
+
+    def handle_event(self, event):
+        if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
+            self.running = False
+        elif event.type == pygame.VIDEORESIZE:
+            self.resize(event.size)
+        elif event.type == pygame.WINDOWSIZECHANGED and self.layers.rotates:
+            # The texture renderer's window is not the display module's, so it gets no VIDEORESIZE
+            self.resize((event.x, event.y))
+        elif event.type == pygame.KEYDOWN:
+            self.emit("input", key=pygame.key.name(event.key))
+            if event.key == pygame.K_ESCAPE:
                 self.running = False
-            elif event.type == pygame.VIDEORESIZE:
-                self.screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
-                self.window_size = self.screen.get_size()
-                # Reposition buttons on resize
-                self.button_rect.center = (self.window_size[0] // 2, int(self.window_size[1] * 0.85))
-                self.close_button_rect.center = (self.window_size[0] // 2, (self.window_size[1] // 2) + 180)
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+            elif event.key == pygame.K_F3:
+                # Toggle the frame-time overlay, collecting from now on if needed
+                if self.frame_stats is None:
+                    self.frame_stats = FrameStats()
+                self.show_frame_stats = not self.show_frame_stats
+            elif event.key == pygame.K_F9:
+                # Start a capture, stop the running one after this frame, or hide the last summary
+                if self.profiler is not None and self.profiler.active:
+                    self.profiler.frames = self.profiler.done + 1
+                elif self.profile_overlay is not None:
+                    self.profile_overlay = None
+                else:
+                    self.start_profile()
+            elif self.state == STATE_STARTUP and event.key == pygame.K_SPACE:
+                self.start_instruction_phase()
+            elif self.state == STATE_STARTUP and event.key == pygame.K_r:
+                self.record_sessions = not self.record_sessions
+            elif self.state == STATE_INSTRUCTION and event.key == pygame.K_SPACE:
+                self.replay_instruction()
+            elif self.state == STATE_END:
+                if event.key == pygame.K_RETURN:
+                    self.reset_game()
+                elif event.key == pygame.K_h and self.history is not None:
+                    self.open_history()
+            elif self.state == STATE_HISTORY:
+                if event.key in (pygame.K_RIGHT, pygame.K_PAGEDOWN):
+                    self.history_next_page()
+                elif event.key in (pygame.K_LEFT, pygame.K_PAGEUP):
+                    self.history_previous_page()
+                elif event.key in (pygame.K_BACKSPACE, pygame.K_RETURN):
+                    self.set_state(STATE_END)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.emit("input", button=event.button, pos=list(event.pos))
+            if self.state == STATE_STARTUP and self.button_rect.collidepoint(event.pos):
+                self.start_instruction_phase()
+            elif self.state == STATE_STARTUP and self.record_button_rect.collidepoint(event.pos):
+                self.record_sessions = not self.record_sessions
+            elif self.state == STATE_END:
+                if self.button_rect.collidepoint(event.pos):
+                    self.reset_game()
+                elif self.close_button_rect.collidepoint(event.pos):
                     self.running = False
-                elif self.state == STATE_STARTUP and event.key == pygame.K_SPACE:
-                    self.start_instruction_phase()
-                elif self.state == STATE_INSTRUCTION and event.key == pygame.K_SPACE:
-                    if self.timer > 10:
-                        self.play_audio(self.current_instruction)
-                    else:
-                        self.play_audio("Ten seconds to focus intentions.mp3")
-                elif self.state == STATE_END:
-                    if event.key == pygame.K_RETURN:
-                        self.reset_game()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if self.state == STATE_STARTUP and self.button_rect.collidepoint(event.pos):
-                    self.start_instruction_phase()
-                elif self.state == STATE_END:
-                    if self.button_rect.collidepoint(event.pos):
-                        self.reset_game()
-                    elif self.close_button_rect.collidepoint(event.pos):
-                        self.running = False
+                elif self.history is not None and self.history_button_rect.collidepoint(event.pos):
+                    self.open_history()
+            elif self.state == STATE_HISTORY and self.button_rect.collidepoint(event.pos):
+                self.set_state(STATE_END)
+
+    def replay_instruction(self):
+        if self.timer > 10:
+            self.play_audio(self.current_instruction, "instruction")
+        else:
+            self.play_audio("Ten seconds to focus intentions.mp3", "warning")
+
+    def status(self):
+        # Live state for the control socket (see control.py). Only whole
+        # timer seconds are reported so it changes at most once a second.
+        playing = self.state in (STATE_INSTRUCTION, STATE_ATTEMPT, STATE_ATTEMPT_END_WAIT)
+        return {"participant": self.participant, "state": self.state, "round": self.round, "rounds": ROUND_TOTAL,
+                "instruction": self.current_instruction if playing else None,
+                "timer": int(self.timer) if playing else None, "recording": self.recorder is not None}
+
+    def command(self, name):
+        # Operator command from the control socket; returns an error message,
+        # or None when it was carried out
+        if name == "start":
+            if self.state != STATE_STARTUP:
+                return f"Cannot start in state {self.state}"
+            self.start_instruction_phase()
+        elif name == "restart":
+            self.schedule_audio(STATE_STARTUP, [])  # Drop the interrupted phase's cues
+            self.reset_game()
+        elif name == "replay":
+            if self.state != STATE_INSTRUCTION:
+                return f"Cannot replay the instruction in state {self.state}"
+            self.replay_instruction()
+        else:
+            return f"Unknown command: {name}"
+        self.emit("command", name=name)
+        return None
+
+    def frame_time_summary(self):
+        # Percentiles of the recent frames per state; FrameStats is left alone
+        return self.recent_frames.summary()
+
+    def mouse_pos(self):
+        # Pointer position on the canvas, which is the logical one when
+        # LOGICAL_SIZE is set, relative to the viewport in group sessions
+        x, y = self.layers.mouse_pos()
+        return x - self.viewport.x, y - self.viewport.y
+
+    def resize(self, window_size):
+        self.fit(self.layers.resize(window_size))
+
+    def set_viewport(self, window, rect):
+        # Draw into rect of the window surface from now on (group sessions)
+        self.viewport = pygame.Rect(rect)
+        self.fit(window.subsurface(self.viewport))
+
+    def fit(self, screen):
+        # Lay out for screen, the window's surface or a viewport of it
+        self.screen = screen
+        self.window_size = self.screen.get_size()
+        self.layers.invalidate()
+        # Scaled and rotated assets are rebuilt for the new size on first use
+        if self.assets.set_window_size(self.window_size):
+            self.rotation_cache.clear()
+        # Reposition buttons on resize
+        self.button_rect.center = (self.window_size[0] // 2, int(self.window_size[1] * 0.85))
+        self.close_button_rect.center = (self.window_size[0] // 2, (self.window_size[1] // 2) + 180)
+
+    def start_recording(self):
+        self.stop_recording()
+        path = output_path(os.path.join("recordings", self.output_name("session") + ".egcap"))
+        self.recorder = FrameRecorder(path)
+        self.recording_started = self.sim_time
+        log.info("Recording session to %s", path)
+
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+        self.recorder.close()
+        summary = self.recorder.summary()
+        self.recorder = None
+        self.emit("recording", **summary)
+        log.info("Recorded %d frames to %s (%d dropped)", summary["frames"], summary["path"], summary["dropped"])
+
+    def start_profile(self, frames=PROFILE_FRAMES):
+        self.profiler = ProfileCapture(frames)
+        self.profile_overlay = None
+        log.info("Profiling %d frames", frames)
+
+    def finish_profile(self):
+        self.profiler.finish()
+        stamp = self.output_name("profile")
+        directory = self.profiler.export(os.path.dirname(output_path(os.path.join("profiles", stamp, "summary.json"))))
+        log.info("Profile of %d frames written to %s", self.profiler.done, directory)
+        for label, own, calls in self.profiler.top_functions(3):
+            log.info("  %.1f ms/frame in %s (%d calls)", own * 1000 / self.profiler.done, label, calls)
+        self.profile_overlay = self.profile_sprite()
+
+    def profile_key(self):
+        # (state, round type) a frame is attributed to
+        if self.plan is not None and self.state in (STATE_INSTRUCTION, STATE_ATTEMPT, STATE_ATTEMPT_END_WAIT):
+            return self.state, self.plan.instruction
+        return self.state, "-"
+
+    def open_history(self):
+        # Aggregates are single-row lookups; sessions are read one page at a time
+        self.history_stats = self.history.participant_stats(self.participant)
+        self.history_round_stats = self.history.round_type_stats(self.participant)
+        self.history_before = [None]
+        self.history_page = self.history.page(self.participant)
+        self.set_state(STATE_HISTORY)
+
+    def history_next_page(self):
+        if len(self.history_page) == HISTORY_PAGE_SIZE:
+            page = self.history.page(self.participant, self.history_page[-1]["id"])
+            if page:
+                self.history_before.append(self.history_page[-1]["id"])
+                self.history_page = page
+
+    def history_previous_page(self):
+        if len(self.history_before) > 1:
+            self.history_before.pop()
+            self.history_page = self.history.page(self.participant, self.history_before[-1])
+
+    def save_session(self):
+        if self.history is None or self.session_started is None:
+            return
+        rounds = []
+        for round_number, plan in enumerate(self.plans, 1):
+            entry = {"instruction": plan.instruction, "started": self.round_started.get(round_number)}
+            if self.results is not None:
+                _, entry["passed"], entry["result"] = self.results[round_number - 1]
+                metrics = self.round_metrics[round_number]
+                entry["net_degrees"] = metrics["net_degrees"]
+                entry["peak_speed"] = metrics["peak_speed"]
+            rounds.append(entry)
+        session_id = self.history.add_session(self.participant, self.session_started, self.eliminated_round, rounds)
+        log.info("Session %d saved to history", session_id)
 
     def start_instruction_phase(self):
-        idx = self.round - 1
-        self.current_instruction = self.instructions[idx]
-        self.current_image = self.images[idx]
-        self.timer = 20
-        self.state = STATE_INSTRUCTION
-        self.play_audio(self.current_instruction)
-        self.ten_sec_audio_played = False  # Reset the flag at the start of each instruction phase
+        if self.round == 1:
+            self.session_started = time.time()
+            if self.record_sessions:
+                self.start_recording()
+        self.plan = self.plans[self.round - 1]
+        self.current_instruction = self.plan.instruction
+        self.timer = INSTRUCTION_SECONDS
+        self.set_state(STATE_INSTRUCTION)
+        self.schedule_audio(STATE_INSTRUCTION, [
+            (0, "instruction", self.current_instruction),
+            (TEN_SECOND_CUE_AT, "warning", "Ten seconds to focus intentions.mp3"),
+        ])
 
     def start_attempt_phase(self):
-        self.timer = 12
-        self.state = STATE_ATTEMPT
-        # Play begin.mp3 at the start of the attempt phase
-        self.play_audio("begin.mp3")
-        # Set rotation direction and speed based on instruction
-        instr = self.current_instruction.strip().lower()
-        
-        if "clockwise" in instr and "counter" not in instr:
-            # This is the Spin Clockwise round
-            self.rotation_direction = 1  # Clockwise
-            self.direction_switch_timer = 0
-            self.rotation_speed = 1  # 60 deg/sec
-            self.rotation_progress = 0
-        elif instr == "spin counter clockwise":
-            # Counter Clockwise round
-            self.rotation_direction = -1  # Counter-clockwise
-            self.direction_switch_timer = 0
-            self.rotation_speed = 1  # 60 deg/sec
-            self.rotation_progress = 0
-        elif "clockwise or counter clockwise" in instr:
-            self.rotation_direction = 1  # Start with clockwise
-            self.direction_switch_timer = 4  # 4 seconds per direction
-            self.rotation_speed = 1  # 60 deg/sec
-            self.rotation_progress = 0
-            # Use the blue arrows image for this round
-            self.current_image = self.blue_arrows_img
-        elif instr == "spin clockwise then counter clockwise":
-            self.rotation_direction = 1  # Start with clockwise
-            self.rotation_speed = 1  # 60 deg/sec
-            self.rotation_progress = 0
-            # Use the special blue arrows image
-            idx = self.instructions.index(self.current_instruction)
-            self.current_image = self.images[idx]
-        elif "spin fast in either direction" in instr:
-            self.rotation_direction = random.choice([-1, 1])
-            self.direction_switch_timer = 0
-            self.rotation_speed = 2.5  # 150 deg/sec
-            self.rotation_progress = 0
-            # Use the blue arrows image for this round
-            self.current_image = self.blue_arrows_img
+        self.timer = ATTEMPT_SECONDS
+        self.attempt_start_wall = time.perf_counter()
+        self.round_started[self.round] = time.time()
+        if self.sensor is not None:
+            import scoring  # NumPy, like sensor.py, is only needed with a sensor
+            self.live_score = scoring.IncrementalScore(self.plan.objective)
+            self.sensor_cursor = self.sensor.written
+        self.set_state(STATE_ATTEMPT)
+        # begin.mp3 at the start of the attempt phase, stop.mp3 when the time is up
+        self.schedule_audio(STATE_ATTEMPT, [(0, "begin", "begin.mp3"), (ATTEMPT_SECONDS, "stop", "stop.mp3")])
+        # Rotation speed and direction from the round's plan
+        if self.plan.direction == "random":
+            self.rotation_direction = self.rng.choice([-1, 1])
         else:
-            self.rotation_direction = random.choice([-1, 1])
-            self.direction_switch_timer = 0
-            self.rotation_speed = 1  # 60 deg/sec
-            self.rotation_progress = 0
-            idx = self.instructions.index(self.current_instruction)
-            self.current_image = self.images[idx]
+            self.rotation_direction = self.plan.direction
+        self.rotation_speed = self.plan.speed
+        self.direction_switch_timer = self.plan.switch_every or 0
+        self.rotation_progress = 0
         self.rotation_angle = 0
+        self.prev_rotation_angle = 0
+
+    def feed_live_score(self):
+        # Score the sensor samples that arrived since the last step
+        sensor = self.sensor
+        end_time = self.attempt_start_wall + ATTEMPT_SECONDS
+        written = sensor.written
+        index = max(self.sensor_cursor, written - sensor.capacity)
+        while index < written:
+            slot = index % sensor.capacity
+            t = float(sensor.times[slot])
+            if t > end_time:
+                break
+            if t >= self.attempt_start_wall:
+                self.live_score.add(t, float(sensor.angles[slot]))
+            index += 1
+        self.sensor_cursor = index
+
+    def collect_sensor_window(self):
+        # Keep the sensor samples from the attempt timer's span for this round
+        if self.sensor is None or self.attempt_start_wall is None:
+            return
+        import scoring
+        self.feed_live_score()
+        times, angles = self.sensor.window(self.attempt_start_wall, self.attempt_start_wall + ATTEMPT_SECONDS)
+        self.round_samples[self.round] = (times - self.attempt_start_wall, angles)
+        passed, text = scoring.score(self.plan.objective, self.live_score.result())
+        self.emit("sensor", round=self.round, samples=len(times), passed=passed, result=text)
+        self.attempt_start_wall = None
+        self.live_score = None
+
+    def score_session(self):
+        # Re-analyse every round's samples in batch for the end screen
+        if self.sensor is None:
+            return
+        import scoring
+        self.results = []
+        for round_number, plan in enumerate(self.plans, 1):
+            times, angles = self.round_samples.get(round_number, ((), ()))
+            metrics = self.round_metrics[round_number] = scoring.analyze(times, angles)
+            passed, text = scoring.score(plan.objective, metrics)
+            self.results.append((plan.instruction, passed, text))
+        self.emit("results", rounds=[{"instruction": i, "passed": p, "result": t} for i, p, t in self.results])
+
+    def attempt_arrow(self):
+        # Rotating image for the current round's attempt phase as
+        # (asset name, image scaled to the window)
+        return self.plan.arrow_name, self.assets.get(self.plan.arrow_name, self.plan.arrow_size)
+
+    def draw_image(self, name, base_size, center, surface=None):
+        image = self.assets.get(name, base_size)
+        if image:
+            (surface or self.screen).blit(image, image.get_rect(center=center))
+
+    def display_angle(self):
+        # Rotation angle interpolated between the last two simulation steps
+        delta = (self.rotation_angle - self.prev_rotation_angle + 180) % 360 - 180
+        return self.prev_rotation_angle + delta * self.render_alpha
 
-    def update(self):
+    def rotated_sprite(self, key, image, center):
+        # Pre-rotated frame and its position; the angle is snapped to the cache's angle step.
+        # The texture renderer rotates the image itself at the exact angle.
+        if self.layers.rotates:
+            return image, image.get_rect(center=center), self.display_angle()
+        frame, offset = self.rotation_cache.get(key, image, -self.display_angle())
+        return frame, frame.get_rect(topleft=(center[0] + offset[0], center[1] + offset[1]))
+
+    def update(self, dt=SIM_DT):
+        # Advance the simulation by dt seconds
+        self.sim_time += dt
         # Animate button scale for hover effect
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.mouse_pos()
         # Start/Restart button
         if self.state in [STATE_STARTUP, STATE_END]:
             hover = self.button_rect.collidepoint(mouse_pos)
             target_scale = 1.08 if hover else 1.0
-            self.button_scale += (target_scale - self.button_scale) * self.button_anim_speed
+            self.button_scale += (target_scale - self.button_scale) * self.button_anim_speed * dt
             # Close button (only on end screen)
             if self.state == STATE_END:
                 close_hover = self.close_button_rect.collidepoint(mouse_pos)
                 close_target_scale = 1.08 if close_hover else 1.0
-                self.close_button_scale += (close_target_scale - self.close_button_scale) * self.button_anim_speed
+                self.close_button_scale += (close_target_scale - self.close_button_scale) * self.button_anim_speed * dt
         # Timer pulse animation
         if self.state in [STATE_INSTRUCTION, STATE_ATTEMPT]:
-            self.timer_pulse += self.timer_pulse_dir * self.timer_pulse_speed
-            if self.timer_pulse > 1.08:
-                self.timer_pulse = 1.08
+            self.timer_pulse += self.timer_pulse_dir * self.timer_pulse_speed * dt
+            if self.timer_pulse > TIMER_PULSE_MAX:
+                self.timer_pulse = TIMER_PULSE_MAX
                 self.timer_pulse_dir = -1
-            elif self.timer_pulse < 0.92:
-                self.timer_pulse = 0.92
+            elif self.timer_pulse < TIMER_PULSE_MIN:
+                self.timer_pulse = TIMER_PULSE_MIN
                 self.timer_pulse_dir = 1
         else:
             self.timer_pulse = 1.0
             self.timer_pulse_dir = 1
+        # Build the upcoming attempt arrow's rotated frames while the instruction plays
+        if self.state == STATE_INSTRUCTION and not self.layers.rotates:
+            key, image = self.attempt_arrow()
+            if image:
+                self.rotation_cache.prewarm(key, image)
         if self.state in [STATE_INSTRUCTION, STATE_ATTEMPT]:
             if self.timer > 0:
                 prev_timer = self.timer
-                self.timer -= 1 / FPS
-                # Play 'Ten seconds to focus intentions.mp3' at 10s left in instruction phase
-                if (
-                    self.state == STATE_INSTRUCTION
-                    and not self.ten_sec_audio_played
-                    and int(self.timer + 1/FPS) == 10  # More precise timing check
-                ):
-                    print("Playing 10 second warning audio")  # Debug print
-                    ten_sec_audio = self.audio.get("Ten seconds to focus intentions.mp3")
-                    if ten_sec_audio:
-                        ten_sec_audio.stop()  # Stop any previous playback
-                        ten_sec_audio.play()
-                        print("10 second warning audio played")  # Debug print
-                    else:
-                        print("10 second warning audio not found")  # Debug print
-                    self.ten_sec_audio_played = True
-                # Play stop.mp3 and switch to wait state when timer reaches 0 in attempt phase
+                self.timer -= dt
+                # Switch to the wait state when the timer reaches 0 in the attempt
+                # phase (stop.mp3 is scheduled for this moment)
                 if self.state == STATE_ATTEMPT and prev_timer > 0 and self.timer <= 0:
-                    print("Playing stop audio")  # Debug print
-                    self.play_audio("stop.mp3")
-                    self.attempt_end_wait_start = pygame.time.get_ticks()
-                    self.state = STATE_ATTEMPT_END_WAIT
+                    self.attempt_end_wait_start = self.sim_time
+                    self.set_state(STATE_ATTEMPT_END_WAIT)
             else:
                 if self.state == STATE_INSTRUCTION:
                     self.start_attempt_phase()
-                    self.ten_sec_audio_played = False  # Reset for next round
         elif self.state == STATE_ATTEMPT_END_WAIT:
             # Wait for 2 seconds before proceeding
             if self.attempt_end_wait_start is not None:
-                elapsed = pygame.time.get_ticks() - self.attempt_end_wait_start
-                if elapsed >= 2000:
+                elapsed = self.sim_time - self.attempt_end_wait_start
+                if elapsed >= ATTEMPT_END_WAIT_SECONDS:
+                    # Samples from the end of the attempt have arrived by now
+                    self.collect_sensor_window()
                     if self.round < ROUND_TOTAL:
                         self.round += 1
-                        self.state = STATE_INSTRUCTION
-                        self.timer = 20
-                        idx = self.round - 1
-                        self.current_instruction = self.instructions[idx]
-                        self.current_image = self.images[idx]
-                        self.play_audio(self.current_instruction)
+                        self.start_instruction_phase()
                     else:
-                        self.state = STATE_END
+                        self.score_session()
+                        self.save_session()
+                        self.set_state(STATE_END)
                         if not self.end_audio_played:
-                            self.play_audio("end_of_game.mp3")
+                            self.schedule_audio(STATE_END, [(0, "end", "end_of_game.mp3")])
                             self.end_audio_played = True
                     self.attempt_end_wait_start = None
-        # Image rotation during ATTEMPT
-        if self.state == STATE_ATTEMPT and self.current_image:
-            if self.current_instruction.strip().lower() == "spin clockwise then counter clockwise":
-                # Rotate one full turn, then switch direction
-                step = self.rotation_direction * self.rotation_speed
-                self.rotation_angle += step
-                self.rotation_angle %= 360
+        if self.live_score is not None and self.state in (STATE_ATTEMPT, STATE_ATTEMPT_END_WAIT):
+            self.feed_live_score()
+        # Image rotation during ATTEMPT, following the round's direction policy
+        if self.state == STATE_ATTEMPT:
+            plan = self.plan
+            if plan.switch_every:
+                self.direction_switch_timer -= dt
+                if self.direction_switch_timer <= 0:
+                    self.rotation_direction *= -1
+                    self.direction_switch_timer = plan.switch_every
+            step = self.rotation_direction * self.rotation_speed * dt
+            self.rotation_angle = (self.rotation_angle + step) % 360
+            if plan.reverse_after:
                 self.rotation_progress += abs(step)
-                if self.rotation_progress >= 360:
+                if self.rotation_progress >= plan.reverse_after:
                     self.rotation_direction *= -1
                     self.rotation_progress = 0
-            else:
-                # Alternate direction for 'Spin Clockwise or Counter Clockwise'
-                if "Clockwise or Counter Clockwise" in self.current_instruction:
-                    self.direction_switch_timer -= 1 / FPS
-                    if self.direction_switch_timer <= 0:
-                        self.rotation_direction *= -1
-                        self.direction_switch_timer = 4
-                self.rotation_angle += self.rotation_direction * self.rotation_speed  # degrees per frame
-                self.rotation_angle %= 360
+        # Hand upcoming cues to the mixer and report the ones that are due
+        for audio_key, found in self.audio_scheduler.update(self.sim_time):
+            self.emit("audio", key=audio_key, found=found)
 
     def render(self):
-        self.screen.fill(BG_COLOR)
+        self.present(self.compose())
+
+    def compose(self):
+        # The static layer is rebuilt only when the scene changes (state, round
+        # or window size); each frame just redraws the timer, the rotating arrow
+        # and the buttons where they changed. Returns the dirty rects, or None
+        # when the whole screen was redrawn.
+        return self.layers.draw(self.screen, self.scene_key(), self.draw_static, self.dynamic_sprites())
+
+    def scene_key(self):
+        # Everything the static layer depends on
+        return (self.state, self.round, self.plan, self.plans[0] if self.plans else None, self.window_size,
+                len(self.history_before))
+
+    def present(self, dirty):
+        self.layers.present(dirty)
+        self.capture_frame(dirty)
+        if self.state == STATE_STARTUP:
+            self.record_startup_metric("time_to_interactive")
+
+    def capture_frame(self, dirty):
+        # Record the frame unless nothing on it changed
+        if self.recorder is not None and dirty != []:
+            self.recorder.capture(self.layers.frame(self.screen), self.sim_time - self.recording_started)
+
+    def draw_static(self, surface):
+        surface.fill(BG_COLOR)
+        w, h = self.window_size
+        if self.state == STATE_STARTUP:
+            self.draw_text_center("Hello Perceptualist, welcome to the Telekinesis challenge we call Spin Control...", 0.2, surface=surface)
+            # Center image(s) of the first round
+            if self.plans:
+                for name, size in self.plans[0].layers[STATE_STARTUP]:
+                    self.draw_image(name, size, (w // 2, int(h * 0.45)), surface)
+        elif self.state == STATE_INSTRUCTION:
+            self.draw_text_center(f"Round {self.round} of {ROUND_TOTAL}", 0.13, self.small_font, surface=surface)
+            self.draw_text_center(self.current_instruction, 0.33, surface=surface)
+            for name, size in self.plan.layers[STATE_INSTRUCTION]:
+                self.draw_image(name, size, (w // 2, int(h * 0.7)), surface)
+            self.draw_text_center("Press SPACE to replay instruction", 0.92, self.small_font, (120, 120, 120), surface)
+        elif self.state == STATE_ATTEMPT:
+            self.draw_text_center(f"Round {self.round} of {ROUND_TOTAL}", 0.13, self.small_font, surface=surface)
+            prompt = self.round_prompts[self.round - 1]
+            self.draw_text_center(prompt, 0.33, surface=surface)
+            # Static wheel background behind the rotating arrow
+            for name, size in self.plan.layers[STATE_ATTEMPT]:
+                self.draw_image(name, size, (w // 2, int(h * 0.7)), surface)
+        elif self.state == STATE_END:
+            if self.results is None:
+                self.draw_text_center("Well done, Perceptualist. Challenge Complete.", 0.33, surface=surface)
+            else:
+                self.draw_text_center("Well done, Perceptualist. Your results:", 0.18, surface=surface)
+                for i, (instruction, passed, text) in enumerate(self.results):
+                    color = TEXT_COLOR if passed is None else RESULT_PASS_COLOR if passed else RESULT_FAIL_COLOR
+                    self.draw_text_center(f"Round {i + 1}: {instruction}: {text}", 0.28 + i * 0.07, self.small_font, color, surface)
+                passed_count = sum(1 for _, passed, _ in self.results if passed)
+                self.draw_text_center(f"{passed_count} of {len(self.results)} rounds achieved", 0.58, self.small_font, surface=surface)
+        elif self.state == STATE_HISTORY:
+            self.draw_history(surface)
+
+    def draw_history(self, surface):
+        self.draw_text_center(f"History: {self.participant}", 0.08, surface=surface)
+        stats = self.history_stats
+        if stats is None:
+            self.draw_text_center("No sessions saved yet", 0.3, self.small_font, surface=surface)
+            return
+        summary = f"{stats['sessions']} sessions"
+        if stats["rounds_scored"]:
+            summary += f", {stats['rounds_passed']} of {stats['rounds_scored']} scored rounds achieved"
+        self.draw_text_center(summary, 0.15, self.small_font, surface=surface)
+        for i, (instruction, rounds, scored, passed) in enumerate(self.history_round_stats):
+            line = f"{instruction}: {rounds} played" + (f", {passed} of {scored} achieved" if scored else "")
+            self.draw_text_center(line, 0.21 + i * 0.045, self.small_font, (90, 90, 90), surface)
+        page_number = len(self.history_before)
+        self.draw_text_center(f"Sessions, page {page_number} (LEFT/RIGHT to page)", 0.46, self.small_font, surface=surface)
+        for i, session in enumerate(self.history_page):
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(session["started"]))
+            minutes, seconds = divmod(int(session["ended"] - session["started"]), 60)
+            if session["rounds_scored"]:
+                outcome = f"{session['rounds_passed']} of {session['rounds_scored']} achieved"
+            else:
+                outcome = "not scored"
+            line = f"{started}   {minutes}:{seconds:02d}   {outcome}"
+            self.draw_text_center(line, 0.51 + i * 0.045, self.small_font, (90, 90, 90), surface)
+
+    def dynamic_sprites(self):
+        # (key, surface, rect) for everything that can change between frames
         w, h = self.window_size
+        sprites = []
         if self.state == STATE_STARTUP:
-            self.draw_text_center("Hello Perceptualist, welcome to the Telekinesis challenge we call Spin Control...", 0.2)
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = self.mouse_pos()
             hover = self.button_rect.collidepoint(mouse_pos)
-            # Center image
-            # If first round uses wheel and arrows, show both
-            if self.instructions and self.instructions[0].strip().lower() in ["spin clockwise then counter clockwise", "spin fast in either direction", "spin clockwise or counter clockwise"]:
-                if self.wheel_bg_img:
-                    startup_wheel = pygame.transform.smoothscale(self.wheel_bg_img, WHEEL_SIZE["startup"])
-                    img_rect = startup_wheel.get_rect(center=(w // 2, int(h * 0.45)))
-                    self.screen.blit(startup_wheel, img_rect)
-                if self.blue_arrows_img:
-                    startup_arrows = pygame.transform.smoothscale(self.blue_arrows_img, BLUE_ARROWS_SIZE["startup"])
-                    arrows_rect = startup_arrows.get_rect(center=(w // 2, int(h * 0.45)))
-                    self.screen.blit(startup_arrows, arrows_rect)
-            elif self.images and self.images[0]:
-                img_rect = self.images[0].get_rect(center=(w // 2, int(h * 0.45)))
-                self.screen.blit(self.images[0], img_rect)
             # Move button lower
             self.button_rect.center = (w // 2, int(h * 0.85))
-            self.draw_button("Start", hover, self.button_rect, self.button_scale)
+            sprites.append(("button",) + self.button_sprite("Start", hover, self.button_rect, self.button_scale))
+            self.record_button_rect.bottomright = (w - 20, h - 20)
+            record_hover = self.record_button_rect.collidepoint(mouse_pos)
+            label = "Record: On" if self.record_sessions else "Record: Off"
+            sprites.append(("record_button",) + self.button_sprite(label, record_hover, self.record_button_rect))
         elif self.state == STATE_INSTRUCTION:
-            self.draw_text_center(f"Round {self.round} of {ROUND_TOTAL}", 0.13, self.small_font)
-            self.draw_text_center(self.current_instruction, 0.33)
             # Timer with pulse animation
-            timer_font = pygame.font.SysFont("Arial", int(36 * self.timer_pulse))
-            self.draw_text_center(f"{int(self.timer):02d}s", 0.45, timer_font, TIMER_COLOR)
-            # If this round uses wheel and arrows, show both
-            if self.current_instruction.strip().lower() in ["spin clockwise then counter clockwise", "spin fast in either direction", "spin clockwise or counter clockwise"]:
-                if self.wheel_bg_img:
-                    instruction_wheel = pygame.transform.smoothscale(self.wheel_bg_img, WHEEL_SIZE["instruction"])
-                    img_rect = instruction_wheel.get_rect(center=(w // 2, int(h * 0.7)))
-                    self.screen.blit(instruction_wheel, img_rect)
-                if self.blue_arrows_img:
-                    instruction_arrows = pygame.transform.smoothscale(self.blue_arrows_img, BLUE_ARROWS_SIZE["instruction"])
-                    arrows_rect = instruction_arrows.get_rect(center=(w // 2, int(h * 0.7)))
-                    self.screen.blit(instruction_arrows, arrows_rect)
-            elif self.current_image:
-                img_rect = self.current_image.get_rect(center=(w // 2, int(h * 0.7)))
-                self.screen.blit(self.current_image, img_rect)
-            self.draw_text_center("Press SPACE to replay instruction", 0.92, self.small_font, (120, 120, 120))
+            timer_font = self.fonts.get(int(36 * self.timer_pulse))
+            sprites.append(("timer",) + self.text_sprite(f"{int(self.timer):02d}s", 0.45, timer_font, TIMER_COLOR))
         elif self.state == STATE_ATTEMPT:
-            self.draw_text_center(f"Round {self.round} of {ROUND_TOTAL}", 0.13, self.small_font)
-            prompt = self.round_prompts[self.round - 1]
-            self.draw_text_center(prompt, 0.33)
             mins, secs = divmod(int(self.timer), 60)
-            timer_font = pygame.font.SysFont("Arial", int(36 * self.timer_pulse))
-            self.draw_text_center(f"{mins:02d}:{secs:02d}", 0.45, timer_font, TIMER_COLOR)
-
-            # Special handling for Spin Clockwise round
-            if self.current_instruction.strip().lower() == "spin clockwise":
-                # Draw static wheel background
-                if self.wheel_bg_img:
-                    attempt_wheel = pygame.transform.smoothscale(self.wheel_bg_img, WHEEL_SIZE["attempt"])
-                    bg_rect = attempt_wheel.get_rect(center=(w // 2, int(h * 0.7)))
-                    self.screen.blit(attempt_wheel, bg_rect)
-                # Draw rotating arrow on top
-                if self.arrow_cw_img:
-                    attempt_arrow = pygame.transform.smoothscale(self.arrow_cw_img, GREEN_ARROW_SIZE["attempt"])
-                    rotated_arrow = pygame.transform.rotate(attempt_arrow, -self.rotation_angle)
-                    arrow_rect = rotated_arrow.get_rect(center=(w // 2, int(h * 0.7)))
-                    self.screen.blit(rotated_arrow, arrow_rect)
-            # Special handling for Spin Clockwise then Counter Clockwise round and Fast in Either Direction
-            elif self.current_instruction.strip().lower() in ["spin clockwise then counter clockwise", "spin fast in either direction", "spin clockwise or counter clockwise"]:
-                # Draw static wheel background
-                if self.wheel_bg_img:
-                    attempt_wheel = pygame.transform.smoothscale(self.wheel_bg_img, WHEEL_SIZE["attempt"])
-                    bg_rect = attempt_wheel.get_rect(center=(w // 2, int(h * 0.7)))
-                    self.screen.blit(attempt_wheel, bg_rect)
-                # Draw rotating arrow on top
-                if self.current_image:
-                    scaled_arrow = pygame.transform.smoothscale(self.current_image, BLUE_ARROWS_SIZE["attempt"])
-                    rotated_arrow = pygame.transform.rotate(scaled_arrow, -self.rotation_angle)
-                    arrow_rect = rotated_arrow.get_rect(center=(w // 2, int(h * 0.7)))
-                    self.screen.blit(rotated_arrow, arrow_rect)
-            # Special handling for Spin Counter Clockwise round
-            elif self.current_instruction.strip().lower() == "spin counter clockwise":
-                # Draw static wheel background
-                if self.wheel_bg_img:
-                    bg_rect = self.wheel_bg_img.get_rect(center=(w // 2, int(h * 0.7)))
-                    self.screen.blit(self.wheel_bg_img, bg_rect)
-                # Draw rotating arrow on top
-                if self.arrow_ccw_img:
-                    rotated_arrow = pygame.transform.rotate(self.arrow_ccw_img, -self.rotation_angle)
-                    arrow_rect = rotated_arrow.get_rect(center=(w // 2, int(h * 0.7)))
-                    self.screen.blit(rotated_arrow, arrow_rect)
-            elif self.current_image:
-                # Regular image handling for other rounds
-                rotated_img = pygame.transform.rotate(self.current_image, -self.rotation_angle)
-                img_rect = rotated_img.get_rect(center=(w // 2, int(h * 0.7)))
-                self.screen.blit(rotated_img, img_rect)
-            elif self.current_instruction == "Spin Fast in Either Direction":
-                print("DEBUG: self.current_image is None for 'Spin Fast in Either Direction'")
-                # Draw a placeholder circle
-                placeholder_rect = pygame.Rect(0, 0, 300, 300)  # Increased from 200x200
-                placeholder_rect.center = (w // 2, int(h * 0.7))
-                pygame.draw.ellipse(self.screen, (200, 200, 200), placeholder_rect)
-                self.draw_text_center("[No Image]", 0.7, self.small_font, (180, 0, 0))
+            timer_font = self.fonts.get(int(36 * self.timer_pulse))
+            sprites.append(("timer",) + self.text_sprite(f"{mins:02d}:{secs:02d}", 0.45, timer_font, TIMER_COLOR))
+            # Rotating arrow on top of the static wheel
+            key, image = self.attempt_arrow()
+            if image:
+                sprites.append(("arrow",) + self.rotated_sprite(key, image, (w // 2, int(h * 0.7))))
         elif self.state == STATE_END:
-            self.draw_text_center("Well done, Perceptualist. Challenge Complete.", 0.33)
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = self.mouse_pos()
             hover = self.button_rect.collidepoint(mouse_pos)
             close_hover = self.close_button_rect.collidepoint(mouse_pos)
             # Move buttons lower
             self.button_rect.center = (w // 2, int(h * 0.7))
             self.close_button_rect.center = (w // 2, int(h * 0.8))
-            self.draw_button("Restart", hover, self.button_rect, self.button_scale)
-            self.draw_button("Close", close_hover, self.close_button_rect, self.close_button_scale)
-        pygame.display.flip()
+            sprites.append(("button",) + self.button_sprite("Restart", hover, self.button_rect, self.button_scale))
+            sprites.append(("close_button",) + self.button_sprite("Close", close_hover, self.close_button_rect, self.close_button_scale))
+            if self.history is not None:
+                self.history_button_rect.center = (w // 2, int(h * 0.9))
+                history_hover = self.history_button_rect.collidepoint(mouse_pos)
+                sprites.append(("history_button",) + self.button_sprite("History", history_hover, self.history_button_rect))
+        elif self.state == STATE_HISTORY:
+            self.button_rect.center = (w // 2, int(h * 0.9))
+            hover = self.button_rect.collidepoint(self.mouse_pos())
+            sprites.append(("button",) + self.button_sprite("Back", hover, self.button_rect))
+        if self.show_frame_stats:
+            overlay = self.frame_stats_sprite()
+            sprites.append(("frame_stats", overlay, overlay.get_rect(topleft=(10, 10))))
+        if self.profiler is not None and self.profiler.active:
+            # Refreshed every 30 frames so the progress text is not rendered every frame
+            text = f"Profiling {self.profiler.done // 30 * 30}/{self.profiler.frames} frames (F9 stops)"
+            label = self.text_cache.render(text, self.fonts.get(16), TEXT_COLOR)
+            sprites.append(("profile", label, label.get_rect(topright=(w - 10, 10))))
+        elif self.profile_overlay is not None:
+            sprites.append(("profile", self.profile_overlay, self.profile_overlay.get_rect(topright=(w - 10, 10))))
+        return sprites
+
+    def frame_stats_sprite(self):
+        # Overlay with the current state's percentiles, refreshed a few times a second
+        now = time.perf_counter()
+        if (self.frame_stats_overlay is None or self.state != self.frame_stats_overlay_state
+                or now - self.frame_stats_overlay_time >= FRAME_STATS_OVERLAY_INTERVAL):
+            self.frame_stats_overlay_time = now
+            self.frame_stats_overlay_state = self.state
+            entry = self.frame_stats.summary().get(self.state, {})
+            lines = [f"{self.state}  frames {entry.get('frames', 0)}  dropped {entry.get('dropped', 0)}"
+                     f"  cpu {self.cpu_meter.percent(self.state):.1f}%",
+                     "stage        p50     p95     p99   (ms)"]
+            for stage in FRAME_STATS_STAGES:
+                if stage in entry:
+                    s = entry[stage]
+                    lines.append(f"{stage:<10} {s['p50']:7.2f} {s['p95']:7.2f} {s['p99']:7.2f}")
+            self.frame_stats_overlay = self.text_overlay(lines)
+        return self.frame_stats_overlay
+
+    def profile_sprite(self):
+        # Summary of the last capture: where the time went and what allocated
+        profiler = self.profiler
+        frames = max(profiler.done, 1)
+        lines = [f"profile  {profiler.done} frames  {profiler.seconds:.1f} s  (F9 hides)",
+                 "ms/frame   calls/frame  function"]
+        for label, own, calls in profiler.top_functions():
+            lines.append(f"{own * 1000 / frames:8.3f} {calls / frames:10.1f}   {label[:60]}")
+        lines.append("KiB kept   blocks       allocation site")
+        for site, size, count in profiler.top_allocations():
+            path, _, line = site.rpartition(":")
+            lines.append(f"{size / 1024:8.1f} {count:10d}   {os.path.basename(path)}:{line}")
+        return self.text_overlay(lines)
+
+    def text_overlay(self, lines):
+        # Translucent panel with one line of small white text per entry
+        font = self.fonts.get(16)
+        rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(r.get_width() for r in rendered) + 16
+        overlay = pygame.Surface((width, len(rendered) * 18 + 12), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        for i, r in enumerate(rendered):
+            overlay.blit(r, (8, 6 + i * 18))
+        return overlay
+
+    def advance(self, frame_time, max_frame_time=MAX_FRAME_TIME):
+        # Run as many fixed simulation steps as the elapsed real time covers;
+        # the remainder carries over and is used to interpolate the render
+        self.collect_assets()
+        self.sim_accumulator += min(frame_time, max_frame_time)
+        while self.sim_accumulator >= SIM_DT:
+            self.prev_rotation_angle = self.rotation_angle
+            self.update(SIM_DT)
+            self.sim_accumulator -= SIM_DT
+        self.render_alpha = self.sim_accumulator / SIM_DT
+
+    def frame_rate(self):
+        # Frames per second the current state needs, or None when nothing
+        # changes until the next input
+        if self.state in (STATE_INSTRUCTION, STATE_ATTEMPT) or self.show_frame_stats:
+            return FPS
+        if self.scene_key() != self.layers.scene:
+            return FPS  # A new screen is drawn right away
+        if self.state in (STATE_STARTUP, STATE_END):
+            mouse_pos = self.mouse_pos()
+            target = 1.08 if self.button_rect.collidepoint(mouse_pos) else 1.0
+            if abs(target - self.button_scale) > BUTTON_SETTLE:
+                return FPS
+            if self.state == STATE_END:
+                target = 1.08 if self.close_button_rect.collidepoint(mouse_pos) else 1.0
+                if abs(target - self.close_button_scale) > BUTTON_SETTLE:
+                    return FPS
+        if self.state == STATE_ATTEMPT_END_WAIT or not IDLE_WAIT_ENABLED:
+            return IDLE_FPS
+        return None
+
+    def frame_delay(self):
+        # Seconds until the next frame is due, for a caller that sleeps
+        # between frames itself (see paced_by_caller); idle frames have
+        # blocked on input in wait_for_frame() already
+        rate = self.frame_rate()
+        if rate is None:
+            return IDLE_SERVE_SECONDS
+        return max(0.0, 1 / rate - (time.perf_counter() - self.frame_started))
+
+    def wait_for_frame(self):
+        # Paces the loop for the current state. Returns (real time since the
+        # previous frame, longest time to simulate, frame budget in seconds).
+        rate = self.frame_rate()
+        self.frame_started = time.perf_counter()
+        if rate is not None:
+            # With paced_by_caller the caller has slept frame_delay() already
+            return self.clock.tick(0 if self.paced_by_caller else rate) / 1000, MAX_FRAME_TIME, 1 / rate
+        idle_wait = IDLE_POLL_SECONDS if self.paced_by_caller else IDLE_WAIT_SECONDS
+        event = pygame.event.wait(int(idle_wait * 1000))
+        if event.type != pygame.NOEVENT:
+            self.handle_event(event)
+        # Idle time is simulated in full so timers and the event log keep up
+        return self.clock.tick() / 1000, idle_wait + MAX_FRAME_TIME, float("inf")
 
     def run_once(self):
+        state = self.state
+        if self.profile_trigger is not None and self.profile_trigger[1] in (None, state):
+            self.start_profile(self.profile_trigger[0])
+            self.profile_trigger = None
+        profiler = self.profiler if self.profiler is not None and self.profiler.active else None
+        if profiler is not None:
+            profiler.begin(self.profile_key())
+        # Each frame is charged from its start to the next frame's, so time the
+        # caller sleeps between frames (paced_by_caller) counts as idle
+        mark = (time.process_time(), time.perf_counter())
+        if self.cpu_mark is not None:
+            self.cpu_meter.record(self.cpu_mark[2], mark[0] - self.cpu_mark[0], mark[1] - self.cpu_mark[1])
+        self.cpu_mark = mark + (state,)
+        if self.frame_stats is not None:
+            self.run_once_instrumented()
+        else:
+            # Real time since the previous frame drives the simulation
+            frame_time, max_frame_time, _ = self.wait_for_frame()
+            work_start = time.perf_counter()
+            self.handle_events()
+            self.advance(frame_time, max_frame_time)
+            self.render()
+            self.recent_frames.record(state, frame_time, time.perf_counter() - work_start)
+        if profiler is not None and profiler.end():
+            self.finish_profile()
+
+    def run_once_instrumented(self):
+        # Same as run_once() with each stage timed and attributed to the state being drawn
+        t0 = time.perf_counter()
+        frame_time, max_frame_time, budget = self.wait_for_frame()
+        t1 = time.perf_counter()
         self.handle_events()
-        self.update()
+        t2 = time.perf_counter()
+        self.advance(frame_time, max_frame_time)
+        t3 = time.perf_counter()
+        dirty = self.compose()
+        t4 = time.perf_counter()
+        self.present(dirty)
+        t5 = time.perf_counter()
+        self.recent_frames.record(self.state, frame_time, t5 - t1)
+        if self.frame_stats is not None:
+            self.frame_stats.record(self.state, (t2 - t1, t3 - t2, t4 - t3, t5 - t4, t1 - t0, frame_time), budget)
+
+class GroupApp:
+    # A group session: one session per participant name, side by side in
+    # viewports of one window. Every participant is an EgelyApp with its own
+    # state machine, timer, wheel and round order. The first opens the window
+    # and loads the assets and the others share its caches, and since the
+    # viewports are all one size they draw the very same scaled images,
+    # rotation frames and text surfaces. A frame waits and polls events once,
+    # advances every participant and presents all their dirty rects in one
+    # display update. Keys go to every participant, clicks to the viewport
+    # under the pointer; only the first participant is heard. Escape or
+    # closing the window ends the group, a Close button just its session. The
+    # frame-time overlay and the profiler (F3, F9) are single-session tools.
+    def __init__(self, names, clock=None, seed=None, window_size=None, sensors=(), history=None):
+        sensors = list(sensors) + [None] * (len(names) - len(sensors))
+        first = EgelyApp(clock=clock, rng=random.Random(seed), window_size=window_size, sensor=sensors[0],
+                         history=history, renderer="surface")
+        self.participants = [first]
+        for i in range(1, len(names)):
+            rng = random.Random(None if seed is None else seed + i)
+            self.participants.append(EgelyApp(clock=first.clock, rng=rng, sensor=sensors[i], history=history,
+                                              shared=first))
+        for i, (app, name) in enumerate(zip(self.participants, names), 1):
+            app.participant = name
+            app.group_index = i
+        self.clock = first.clock
+        self.window = first.screen
+        self.running = first.running
+        self.paced_by_caller = False  # See EgelyApp.paced_by_caller
+        self.frame_started = time.perf_counter()
+        self.layout()
+
+    def layout(self):
+        # The grid whose cells fit the most of a LAYOUT_REFERENCE_SIZE scene
+        w, h = self.window.get_size()
+        count = len(self.participants)
+        rw, rh = LAYOUT_REFERENCE_SIZE
+        columns = max(range(1, count + 1), key=lambda c: min(w / c / rw, h / -(-count // c) / rh))
+        rows = -(-count // columns)
+        cell_w, cell_h = w // columns, h // rows
+        self.window.fill(GROUP_BORDER_COLOR)
+        for i, app in enumerate(self.participants):
+            cell = pygame.Rect(i % columns * cell_w, i // columns * cell_h, cell_w, cell_h)
+            app.set_viewport(self.window, cell.inflate(-GROUP_BORDER, -GROUP_BORDER))
+        self.full_redraw = True
+
+    def handle_event(self, event):
+        if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
+            self.running = False
+        elif event.type == pygame.VIDEORESIZE:
+            self.window = self.participants[0].layers.resize(event.size)
+            self.layout()
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.running = False
+            elif event.key not in (pygame.K_F3, pygame.K_F9):
+                for app in self.participants:
+                    app.handle_event(event)
+        elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION):
+            for app in self.participants:
+                if app.viewport.collidepoint(event.pos):
+                    pos = (event.pos[0] - app.viewport.x, event.pos[1] - app.viewport.y)
+                    app.handle_event(pygame.event.Event(event.type, dict(event.dict, pos=pos)))
+                    break
+
+    def frame_rate(self):
+        # The busiest participant's, see EgelyApp.frame_rate()
+        rates = [rate for rate in (app.frame_rate() for app in self.participants) if rate is not None]
+        return max(rates) if rates else None
+
+    def frame_delay(self):
+        # See EgelyApp.frame_delay()
+        rate = self.frame_rate()
+        if rate is None:
+            return IDLE_SERVE_SECONDS
+        return max(0.0, 1 / rate - (time.perf_counter() - self.frame_started))
+
+    def wait_for_frame(self):
+        # Paced for the busiest participant; see EgelyApp.wait_for_frame()
+        rate = self.frame_rate()
+        self.frame_started = time.perf_counter()
+        if rate is not None:
+            return self.clock.tick(0 if self.paced_by_caller else rate) / 1000, MAX_FRAME_TIME
+        idle_wait = IDLE_POLL_SECONDS if self.paced_by_caller else IDLE_WAIT_SECONDS
+        event = pygame.event.wait(int(idle_wait * 1000))
+        if event.type != pygame.NOEVENT:
+            self.handle_event(event)
+        return self.clock.tick() / 1000, idle_wait + MAX_FRAME_TIME
+
+    def run_once(self):
+        frame_time, max_frame_time = self.wait_for_frame()
+        work_start = time.perf_counter()
+        for event in pygame.event.get():
+            self.handle_event(event)
+        for app in self.participants:
+            app.advance(frame_time, max_frame_time)
         self.render()
-        self.clock.tick(FPS)
+        # Each participant is charged the whole group frame
+        work = time.perf_counter() - work_start
+        for app in self.participants:
+            app.recent_frames.record(app.state, frame_time, work)
+        # A participant's Close button closes only their own session: the
+        # viewport returns to the start screen while the others play on
+        for app in self.participants:
+            if not app.running:
+                app.running = True
+                app.reset_game()
+
+    def render(self):
+        dirty = []
+        for app in self.participants:
+            rects = app.compose()
+            app.capture_frame(rects)
+            if rects is None:
+                dirty.append(app.viewport)
+            else:
+                dirty.extend(rect.move(app.viewport.topleft) for rect in rects)
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        elif dirty:
+            pygame.display.update(dirty)
+        self.participants[0].record_startup_metric("time_to_interactive")
 
 async def main():
-    app = EgelyApp()
-    app.reset_game()
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(message)s")
+    history = None
+    if HISTORY_ENABLED:
+        history = SessionHistory(output_path("history.sqlite3"))
+    sensors = []
+    if SENSOR_SOURCE:
+        from sensor import SensorReader
+        sensors = [SensorReader(source) for source in (SENSOR_SOURCE.split(",") if GROUP else [SENSOR_SOURCE])]
+    if GROUP:
+        app = GroupApp(GROUP, sensors=sensors, history=history)
+        sessions = app.participants
+    else:
+        app = EgelyApp(sensor=sensors[0] if sensors else None, history=history)
+        sessions = [app]
+    event_log = None
+    if EVENT_LOG_ENABLED:
+        event_log = EventLog(output_path(os.path.join("sessions", time.strftime("session_%Y%m%d_%H%M%S.jsonl"))))
+        for session in sessions:
+            if GROUP:
+                session.listeners.append(lambda event, name=session.participant: event_log.write(dict(event, participant=name)))
+            else:
+                session.listeners.append(event_log.write)
+    for session in sessions:
+        session.reset_game()
+    control = None
+    if CONTROL_ADDRESS:
+        from control import ControlServer
+        control = ControlServer(sessions, KIOSK_NAME)
+        await control.start(CONTROL_ADDRESS)
+        app.paced_by_caller = True
+        log.info("Control socket listening on %s", CONTROL_ADDRESS)
     while app.running:
         app.run_once()
-        await asyncio.sleep(0)
+        delay = 0
+        if control is not None:
+            control.publish()
+            delay = app.frame_delay()
+        # Control requests and socket writes are handled here, between frames
+        await asyncio.sleep(delay)
+    if control is not None:
+        await control.close()
+    for session in sessions:
+        session.export_frame_stats()
+        session.report_cpu_usage()
+        session.stop_recording()
+    for sensor in sensors:
+        sensor.close()
+    if history is not None:
+        history.close()
+    if event_log is not None:
+        event_log.close()
 
 if platform.system() == "Emscripten":
     asyncio.ensure_future(main())
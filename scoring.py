@@ -0,0 +1,144 @@
+import numpy as np
+
+# Angles are cumulative degrees from sensor.py, increasing clockwise
+SUCCESS_DEGREES = 90  # Net turn in the asked direction that counts as a success
+FAST_DEGREES_PER_SECOND = 360  # Peak speed that counts as fast (one turn per second)
+REVERSAL_MIN_DEGREES = 30  # Turn against the current direction needed to count as a reversal
+SPEED_SMOOTHING_SECONDS = 0.1  # Time constant of the speed estimate
+RESAMPLE_HZ = 100  # Uniform rate the batch analysis resamples to
+
+# Score objectives used by ROUND_SPECS
+OBJECTIVES = ("clockwise", "counter_clockwise", "either", "fast", "reversal")
+
+
+class IncrementalScore:
+    # Motion metrics updated with O(1) work per sample while an attempt runs
+    def __init__(self, objective):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown score objective: {objective}")
+        self.objective = objective
+        self.samples = 0
+        self.net = 0.0
+        self.cw = 0.0
+        self.ccw = 0.0
+        self.velocity = 0.0  # Smoothed signed speed, deg/sec
+        self.peak_speed = 0.0
+        self.reversals = 0
+        self.first_direction = 0
+        self.direction = 0  # 1 clockwise, -1 counter-clockwise, 0 not moved enough yet
+        self.extreme = None  # Furthest angle reached in the current direction
+        self.low = self.high = None  # Range seen before the first direction is known
+        self.last_time = None
+        self.last_angle = None
+
+    def add(self, t, angle):
+        self.samples += 1
+        if self.last_angle is None:
+            self.last_time, self.last_angle = t, angle
+            self.low = self.high = angle
+            return
+        delta = angle - self.last_angle
+        dt = t - self.last_time
+        self.last_time, self.last_angle = t, angle
+        self.net += delta
+        if delta > 0:
+            self.cw += delta
+        else:
+            self.ccw -= delta
+        if dt > 0:
+            self.velocity += (delta / dt - self.velocity) * min(1.0, dt / SPEED_SMOOTHING_SECONDS)
+            if abs(self.velocity) > self.peak_speed:
+                self.peak_speed = abs(self.velocity)
+        # Direction changes with hysteresis, so jitter is not counted
+        if self.direction == 0:
+            self.low = min(self.low, angle)
+            self.high = max(self.high, angle)
+            if angle - self.low >= REVERSAL_MIN_DEGREES:
+                self.direction = self.first_direction = 1
+                self.extreme = angle
+            elif self.high - angle >= REVERSAL_MIN_DEGREES:
+                self.direction = self.first_direction = -1
+                self.extreme = angle
+        elif (angle - self.extreme) * self.direction > 0:
+            self.extreme = angle
+        elif (self.extreme - angle) * self.direction >= REVERSAL_MIN_DEGREES:
+            self.direction = -self.direction
+            self.extreme = angle
+            self.reversals += 1
+
+    def result(self):
+        return {
+            "samples": self.samples,
+            "net_degrees": self.net,
+            "cw_degrees": self.cw,
+            "ccw_degrees": self.ccw,
+            "peak_speed": self.peak_speed,
+            "reversals": self.reversals,
+            "first_direction": self.first_direction,
+        }
+
+
+def analyze(times, angles):
+    # Batch version of IncrementalScore.result() for a whole attempt: the
+    # samples are resampled to RESAMPLE_HZ, smoothed, differentiated and the
+    # dominant frequency of the speed (e.g. a wobbling wheel) is added
+    times = np.asarray(times, dtype=float)
+    angles = np.asarray(angles, dtype=float)
+    result = {"samples": len(times), "net_degrees": 0.0, "cw_degrees": 0.0, "ccw_degrees": 0.0,
+              "peak_speed": 0.0, "reversals": 0, "first_direction": 0, "wobble_hz": 0.0}
+    if len(times) < 2 or times[-1] <= times[0]:
+        return result
+    steps = np.diff(angles)
+    result["net_degrees"] = float(angles[-1] - angles[0])
+    result["cw_degrees"] = float(steps[steps > 0].sum())
+    result["ccw_degrees"] = float(-steps[steps < 0].sum())
+
+    grid = np.arange(times[0], times[-1], 1 / RESAMPLE_HZ)
+    uniform = np.interp(grid, times, angles)
+    width = max(1, int(round(SPEED_SMOOTHING_SECONDS * RESAMPLE_HZ)))
+    if len(uniform) > width:
+        padded = np.pad(uniform, (width // 2, width - 1 - width // 2), mode="edge")
+        uniform = np.convolve(padded, np.ones(width) / width, mode="valid")
+    if len(uniform) < 2:
+        return result
+    velocity = np.gradient(uniform, 1 / RESAMPLE_HZ)
+    result["peak_speed"] = float(np.abs(velocity).max())
+
+    # Runs of constant direction; runs shorter than REVERSAL_MIN_DEGREES are jitter
+    signs = np.sign(velocity)
+    moving = signs != 0
+    if moving.any():
+        starts = np.flatnonzero(np.r_[True, signs[1:] != signs[:-1]])
+        turned = np.add.reduceat(velocity / RESAMPLE_HZ, starts)
+        kept = np.sign(turned[np.abs(turned) >= REVERSAL_MIN_DEGREES])
+        if len(kept):
+            # Neighbouring runs in the same direction merge into one
+            kept = kept[np.r_[True, kept[1:] != kept[:-1]]]
+            result["first_direction"] = int(kept[0])
+            result["reversals"] = len(kept) - 1
+
+    spectrum = np.abs(np.fft.rfft(velocity - velocity.mean()))
+    if len(spectrum) > 1:
+        freqs = np.fft.rfftfreq(len(velocity), 1 / RESAMPLE_HZ)
+        result["wobble_hz"] = float(freqs[1 + np.argmax(spectrum[1:])])
+    return result
+
+
+def score(objective, metrics):
+    # (passed, summary text); passed is None when there were no samples
+    if metrics["samples"] < 2:
+        return None, "no wheel data"
+    net = float(metrics["net_degrees"])
+    turned = f"{abs(net):.0f}° {'clockwise' if net >= 0 else 'counter-clockwise'}"
+    if objective == "clockwise":
+        return net >= SUCCESS_DEGREES, turned
+    if objective == "counter_clockwise":
+        return -net >= SUCCESS_DEGREES, turned
+    if objective == "either":
+        return abs(net) >= SUCCESS_DEGREES, turned
+    if objective == "fast":
+        peak = float(metrics["peak_speed"])
+        return peak >= FAST_DEGREES_PER_SECOND, f"peak {peak:.0f}°/s"
+    reversals = metrics["reversals"]
+    passed = reversals >= 1 and metrics["first_direction"] == 1
+    return passed, f"{reversals} reversal{'s' if reversals != 1 else ''}"
@@ -0,0 +1,238 @@
+import argparse
+import itertools
+import logging
+import math
+import os
+import select
+import sys
+import threading
+import time
+
+import numpy as np
+
+try:
+    import serial  # pyserial, only needed for real serial/USB devices
+except ImportError:
+    serial = None
+
+log = logging.getLogger("egely")
+
+# Ring buffer size in samples; about a minute of history at 1 kHz
+SENSOR_RING_SIZE = 1 << 16
+SENSOR_PULSES_PER_REV = 36  # Encoder pulses per wheel revolution for "P" lines
+SENSOR_BAUD = 115200
+SENSOR_READ_SIZE = 4096  # Bytes read per system call
+SENSOR_POLL_SECONDS = 0.1  # Longest wait for data before checking for close()
+SENSOR_COPY_MARGIN = 1024  # Oldest samples skipped by window() as the writer may be overwriting them
+SENSOR_FILE_RATE = 1000  # Samples per second a regular file is replayed at unless it has an R line
+
+# Line protocol, one sample per line:
+#   A <degrees>   absolute wheel angle, increasing clockwise (wraps at 360)
+#   P <count>     encoder pulses since the previous line, negative when counter-clockwise
+#   <degrees>     same as A
+#   R <rate>      samples per second, for replaying a regular file (first line)
+# Samples are stamped on arrival; when several arrive in one read their
+# times are spread evenly since the previous read. A regular file arrives in
+# one read, so it is replayed instead: its samples are released at the R
+# rate (SENSOR_FILE_RATE without one) from when the reader starts, as a
+# device would send them.
+
+
+class SensorReader:
+    # Reads wheel samples from a serial device, pipe, pty or recorded file on a
+    # background thread into a preallocated ring buffer of (time, cumulative
+    # angle in degrees). There is a single writer; readers use `written` to
+    # find the newest samples and never take a lock. Times are
+    # time.perf_counter() seconds.
+    def __init__(self, source, capacity=SENSOR_RING_SIZE, pulses_per_rev=SENSOR_PULSES_PER_REV, baud=SENSOR_BAUD):
+        self.source = source
+        self.capacity = capacity
+        self.pulses_per_rev = pulses_per_rev
+        self.baud = baud
+        self.times = np.zeros(capacity)
+        self.angles = np.zeros(capacity)
+        self.written = 0  # Total samples ever written; slot is written % capacity
+        self.errors = 0  # Lines that could not be parsed
+        self.angle = 0.0  # Cumulative angle of the last sample
+        self.raw_angle = None  # Last absolute reading, for unwrapping
+        self.last_read = time.perf_counter()
+        self.closing = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="sensor-reader", daemon=True)
+        self.thread.start()
+
+    def latest(self):
+        # (time, cumulative angle) of the newest sample, or None
+        written = self.written
+        if not written:
+            return None
+        slot = (written - 1) % self.capacity
+        return self.times[slot], self.angles[slot]
+
+    def window(self, start, end):
+        # Samples with start <= time <= end as (times, angles) arrays
+        written = self.written
+        first = max(0, written - self.capacity + SENSOR_COPY_MARGIN)
+        slots = np.arange(first, written) % self.capacity
+        times = self.times[slots]
+        angles = self.angles[slots]
+        lo = np.searchsorted(times, start, "left")
+        hi = np.searchsorted(times, end, "right")
+        return times[lo:hi], angles[lo:hi]
+
+    def close(self):
+        self.closing.set()
+        self.thread.join(timeout=1.0)
+
+    def _open(self):
+        # Returns a read(n) callable; it returns b"" at end of input
+        if _is_serial_port(self.source):
+            if serial is not None:
+                port = serial.Serial(self.source, self.baud, timeout=SENSOR_POLL_SECONDS)
+                return port.read, port.close
+            log.warning("pyserial is not installed; reading %s without setting its baud rate", self.source)
+        fd = os.open(self.source, os.O_RDONLY)
+
+        def read(n):
+            # Wait with a timeout so close() is noticed on an idle device
+            ready, _, _ = select.select([fd], [], [], SENSOR_POLL_SECONDS)
+            return os.read(fd, n) if ready else None
+        return read, lambda: os.close(fd)
+
+    def _replay(self):
+        with open(self.source, "rb") as f:
+            lines = iter(f)
+            first = next(lines, b"")
+            rate = SENSOR_FILE_RATE
+            if first[:1] in (b"R", b"r"):
+                rate = float(first.split()[1])
+            else:
+                lines = itertools.chain([first], lines)
+            start = time.perf_counter()
+            self.last_read = start
+            released = 0
+            while not self.closing.wait(0.01):
+                wanted = int((time.perf_counter() - start) * rate) - released
+                batch = list(itertools.islice(lines, max(wanted, 0)))
+                released += len(batch)
+                self._push(batch)
+                if len(batch) < wanted:
+                    break  # End of the file
+
+    def _run(self):
+        if os.path.isfile(self.source):
+            self._replay()
+            return
+        read, close = self._open()
+        pending = b""
+        try:
+            while not self.closing.is_set():
+                try:
+                    chunk = read(SENSOR_READ_SIZE)
+                except OSError:
+                    break  # pty closed by the other end
+                if chunk is None:
+                    continue
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                self._push(lines)
+        finally:
+            close()
+
+    def _push(self, lines):
+        deltas = []
+        for line in lines:
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                if parts[0] in (b"R", b"r"):
+                    continue
+                if parts[0] in (b"P", b"p"):
+                    deltas.append(int(parts[1]) * 360.0 / self.pulses_per_rev)
+                else:
+                    raw = float(parts[-1] if parts[0] in (b"A", b"a") else parts[0])
+                    if self.raw_angle is None:
+                        self.raw_angle = raw
+                    deltas.append((raw - self.raw_angle + 180.0) % 360.0 - 180.0)
+                    self.raw_angle = raw
+            except (ValueError, IndexError):
+                self.errors += 1
+        if not deltas:
+            return
+        now = time.perf_counter()
+        n = len(deltas)
+        times = np.linspace(self.last_read, now, n + 1)[1:]
+        angles = self.angle + np.cumsum(deltas)
+        self.last_read = now
+        self.angle = float(angles[-1])
+        if n > self.capacity:
+            times, angles, skipped = times[-self.capacity:], angles[-self.capacity:], n - self.capacity
+        else:
+            skipped = 0
+        start = (self.written + skipped) % self.capacity
+        first = min(len(times), self.capacity - start)
+        self.times[start:start + first] = times[:first]
+        self.angles[start:start + first] = angles[:first]
+        rest = len(times) - first
+        if rest:
+            self.times[:rest] = times[first:]
+            self.angles[:rest] = angles[first:]
+        # Publish only after the slots hold the new data
+        self.written += n
+
+
+def _is_serial_port(path):
+    return path.upper().startswith("COM") or path.startswith("/dev/tty") or path.startswith("/dev/cu.")
+
+
+def simulate(rate, rpm, seconds, out=None):
+    # Stand-in device: writes "A <degrees>" lines at `rate` Hz for a wheel
+    # turning at `rpm` (with a slow wobble) to a new pty, or to the file
+    # `out` headed by an R line so it replays at `rate`
+    if out is None:
+        master, slave = os.openpty()
+        print(f"Simulated wheel on {os.ttyname(slave)} (EGELY_SENSOR={os.ttyname(slave)})", flush=True)
+        write = lambda data: os.write(master, data)
+    else:
+        f = open(out, "wb")
+        write = f.write
+        write(f"R {rate}\n".encode())
+    start = time.perf_counter()
+    sent = 0
+    while seconds is None or sent < rate * seconds:
+        now = time.perf_counter() - start
+        due = int(now * rate)
+        if out is not None:
+            due = sent + rate // 100  # Files are written as fast as possible
+        lines = []
+        while sent < due:
+            t = sent / rate
+            angle = (rpm * 6.0 * t + 5.0 * math.sin(t)) % 360.0
+            lines.append(f"A {angle:.3f}\n")
+            sent += 1
+        if lines:
+            write("".join(lines).encode())
+        if out is None:
+            time.sleep(0.005)
+    if out is not None:
+        f.close()
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated Egely wheel sensor for testing.")
+    parser.add_argument("--rate", type=int, default=1000, help="samples per second")
+    parser.add_argument("--rpm", type=float, default=10.0, help="wheel speed, negative for counter-clockwise")
+    parser.add_argument("--seconds", type=float, help="stop after this long (default: run until interrupted)")
+    parser.add_argument("--out", help="write samples to this file instead of a pty")
+    args = parser.parse_args(argv)
+    try:
+        simulate(args.rate, args.rpm, args.seconds, args.out)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,218 @@
+import os
+
+# Soak runs use SDL's dummy drivers; set them before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import gc
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pygame
+
+try:
+    import resource  # Not on Windows
+except ImportError:
+    resource = None
+
+import main
+from headless import DEFAULT_SCRIPT, ScriptedInput, SimulatedClock
+
+SOAK_CYCLES = 100  # Start -> 4 rounds -> Restart cycles
+SOAK_WARMUP = 10  # Cycles before measuring, while caches fill (every round type has been seen by then)
+MAX_RSS_SLOPE_KIB = 256  # Allowed growth per cycle after warm-up
+MAX_PYTHON_SLOPE_KIB = 32
+MAX_SURFACE_SLOPE = 0.5
+ROUND_STATES = (main.STATE_INSTRUCTION, main.STATE_ATTEMPT, main.STATE_ATTEMPT_END_WAIT)
+
+
+def rss_bytes():
+    # Current resident set size; the peak where /proc is not available, 0 on Windows
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def cached_surfaces(app):
+    # Ids of the Surfaces held by the app's bounded caches. These fill towards
+    # their caps over many cycles (new text, rotation frames), which is not a
+    # leak, so they are left out of the count.
+    surfaces = list(app.text_cache.surfaces.values()) + list(app.button_surfaces.values())
+    surfaces += list(app.assets.scaled.values())
+    surfaces += [frame for frame, _ in app.rotation_cache.frames.values()]
+    return {id(surface) for surface in surfaces}
+
+
+def count_surfaces(app=None):
+    # Live pygame Surfaces reachable from Python objects, less those in app's
+    # bounded caches. Surfaces are not tracked by the garbage collector, and
+    # neither are dicts and tuples that only hold untracked objects, so those
+    # are searched through as well.
+    found = set()
+    seen = set()
+    pending = gc.get_objects()
+    while pending:
+        for ref in gc.get_referents(*pending[-1000:]):
+            if isinstance(ref, pygame.Surface):
+                found.add(id(ref))
+            elif isinstance(ref, (dict, tuple, list)) and not gc.is_tracked(ref) and id(ref) not in seen:
+                seen.add(id(ref))
+                pending.append(ref)
+        del pending[-1000:]
+    if app is not None:
+        found -= cached_surfaces(app)
+    return len(found)
+
+
+def slope(values):
+    # Least-squares growth per cycle
+    if len(values) < 2:
+        return 0.0
+    return float(np.polyfit(np.arange(len(values)), values, 1)[0])
+
+
+class SoakMonitor:
+    # Listens to state changes and charges Python heap growth (tracemalloc) and
+    # new live Surfaces (outside the bounded caches) to the (state, round type)
+    # that was running
+    def __init__(self, app):
+        self.app = app
+        self.key = (main.STATE_STARTUP, "-")
+        self.traced = tracemalloc.get_traced_memory()[0]
+        self.surfaces = count_surfaces(app)
+        self.measuring = False
+        self.growth = {}  # key -> [visits, python bytes, surfaces]
+        app.listeners.append(self.on_event)
+
+    def on_event(self, event):
+        if event["event"] != "state":
+            return
+        traced = tracemalloc.get_traced_memory()[0]
+        surfaces = count_surfaces(self.app)
+        if self.measuring:
+            entry = self.growth.setdefault(self.key, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += traced - self.traced
+            entry[2] += surfaces - self.surfaces
+        self.traced, self.surfaces = traced, surfaces
+        state = event["state"]
+        plan = self.app.plans[event["round"] - 1] if state in ROUND_STATES and self.app.plans else None
+        self.key = (state, plan.instruction if plan else "-")
+
+
+def run_cycle(app, inputs, max_frames):
+    # One Start -> 4 rounds -> Restart cycle, rendering every frame
+    frames = 0
+    while app.running and frames < max_frames:
+        frame_time = app.clock.tick(main.FPS) / 1000
+        app.handle_events()
+        was_end = app.state == main.STATE_END
+        inputs.feed(app)
+        if was_end and app.state == main.STATE_STARTUP:
+            return frames
+        app.advance(frame_time)
+        app.render()
+        frames += 1
+    return frames
+
+
+def run_soak(cycles, warmup, seed=0, frame_time=1 / main.FPS, window_size=(1280, 720), progress=None):
+    tracemalloc.start()
+    app = main.EgelyApp(clock=SimulatedClock(frame_time), rng=random.Random(seed), window_size=window_size)
+    app.reset_game()
+    inputs = ScriptedInput(DEFAULT_SCRIPT)
+    monitor = SoakMonitor(app)
+    # A session is well under 200 simulated seconds; more means the script is stuck
+    max_frames = int(200 / frame_time)
+    samples = []
+    for cycle in range(cycles):
+        monitor.measuring = cycle >= warmup
+        frames = run_cycle(app, inputs, max_frames)
+        if frames >= max_frames or not app.running:
+            raise RuntimeError(f"Cycle {cycle} did not return to the start screen")
+        gc.collect()
+        samples.append({"cycle": cycle, "frames": frames, "rss": rss_bytes(),
+                        "python": tracemalloc.get_traced_memory()[0], "surfaces": count_surfaces(app)})
+        if progress:
+            progress(samples[-1])
+    tracemalloc.stop()
+    measured = samples[warmup:]
+    report = {
+        "cycles": cycles,
+        "warmup": warmup,
+        "rss_slope_kib": slope([s["rss"] for s in measured]) / 1024,
+        "python_slope_kib": slope([s["python"] for s in measured]) / 1024,
+        "surface_slope": slope([s["surfaces"] for s in measured]),
+        "by_state": [{"state": state, "round": round_type, "visits": visits,
+                      "python_kib_per_visit": py / visits / 1024, "surfaces_per_visit": surfaces / visits}
+                     for (state, round_type), (visits, py, surfaces) in monitor.growth.items()],
+        "samples": samples,
+    }
+    report["by_state"].sort(key=lambda e: e["python_kib_per_visit"], reverse=True)
+    return report
+
+
+def check(report, max_rss, max_python, max_surfaces):
+    # Returns a list of human-readable failures
+    failures = []
+    if report["rss_slope_kib"] > max_rss:
+        failures.append(f"RSS grows {report['rss_slope_kib']:.1f} KiB/cycle (limit {max_rss})")
+    if report["python_slope_kib"] > max_python:
+        failures.append(f"Python heap grows {report['python_slope_kib']:.1f} KiB/cycle (limit {max_python})")
+    if report["surface_slope"] > max_surfaces:
+        failures.append(f"Live surfaces grow {report['surface_slope']:.2f}/cycle (limit {max_surfaces})")
+    return failures
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Run many accelerated sessions and check memory stays flat.")
+    parser.add_argument("--cycles", type=int, default=SOAK_CYCLES, help="Start -> 4 rounds -> Restart cycles")
+    parser.add_argument("--warmup", type=int, default=SOAK_WARMUP, help="cycles before measuring")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frame-time", type=float, default=1 / main.FPS, help="simulated seconds per frame")
+    parser.add_argument("--max-rss-slope", type=float, default=MAX_RSS_SLOPE_KIB, help="KiB per cycle")
+    parser.add_argument("--max-python-slope", type=float, default=MAX_PYTHON_SLOPE_KIB, help="KiB per cycle")
+    parser.add_argument("--max-surface-slope", type=float, default=MAX_SURFACE_SLOPE, help="surfaces per cycle")
+    parser.add_argument("--report", help="write the full report as JSON to this file")
+    args = parser.parse_args(argv)
+    if args.cycles <= args.warmup + 1:
+        parser.error("--cycles must be at least --warmup + 2")
+
+    logging.basicConfig(level=logging.ERROR)
+    start = time.perf_counter()
+
+    def progress(sample):
+        print(f"cycle {sample['cycle']:5d}  rss {sample['rss'] / 2**20:8.1f} MiB  "
+              f"python {sample['python'] / 2**20:7.2f} MiB  surfaces {sample['surfaces']:6d}", flush=True)
+
+    report = run_soak(args.cycles, args.warmup, args.seed, args.frame_time, progress=progress)
+    print(f"{args.cycles} cycles in {time.perf_counter() - start:.0f} s; after {args.warmup} warm-up cycles: "
+          f"RSS {report['rss_slope_kib']:+.1f} KiB/cycle, Python {report['python_slope_kib']:+.1f} KiB/cycle, "
+          f"surfaces {report['surface_slope']:+.2f}/cycle")
+    print(f"{'state':<18} {'round':<42} {'visits':>7} {'KiB/visit':>10} {'surf/visit':>11}")
+    for entry in report["by_state"]:
+        print(f"{entry['state']:<18} {entry['round']:<42} {entry['visits']:7d} "
+              f"{entry['python_kib_per_visit']:10.2f} {entry['surfaces_per_visit']:11.2f}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    failures = check(report, args.max_rss_slope, args.max_python_slope, args.max_surface_slope)
+    for line in failures:
+        print(f"FAIL {line}")
+    pygame.quit()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())